@@ -6,21 +6,101 @@ A browser-based digital signage system built with Flask and vanilla JavaScript.
 
 import os
 import json
+import mimetypes
 import sqlite3
 import hashlib
 import secrets
+import shutil
 import time
+import atexit
+import bisect
+import random
+import re
+import tempfile
+import threading
+import urllib.error
 import urllib.request
 import urllib.parse
-from datetime import datetime
+from html.parser import HTMLParser
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from functools import wraps
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, send_from_directory
-from werkzeug.utils import secure_filename
-import feedparser
+from contextlib import contextmanager
+from flask import Flask, Response, render_template, request, jsonify, session, redirect, url_for, send_from_directory, g
+import db
+import assets
+import metrics
+import migrations
 
 # In-memory cache for weather data
-_weather_cache = {}
 WEATHER_CACHE_TTL = 600  # 10 minutes
+WEATHER_CACHE_MAX = 512  # locations kept before the least recently used is evicted
+WEATHER_GRID_DECIMALS = 2  # coordinates are rounded to this many decimals (~1km)
+WEATHER_BATCH_SIZE = 50  # locations requested per Open-Meteo call
+OPEN_METEO_URL = os.environ.get('SIGNAGE_OPEN_METEO_URL', 'https://api.open-meteo.com')
+
+# Geocoding
+GEOCODE_CACHE_TTL = 30 * 24 * 3600  # seconds a cached online lookup is trusted
+GEOCODE_RESULTS = 5
+
+# RSS feed cache
+RSS_CACHE_TTL = int(os.environ.get('SIGNAGE_RSS_TTL', 300))  # seconds before a feed is revalidated
+RSS_RETRY_INTERVAL = 60  # seconds to wait before retrying a failed feed
+RSS_FETCH_TIMEOUT = 10  # seconds a whole feed download may take
+RSS_MAX_BYTES = 5 * 1024 * 1024  # larger feeds are treated as failed
+RSS_CACHE_MAX_FEEDS = 256
+RSS_MAX_ITEMS = 20            # items kept per feed
+RSS_DESCRIPTION_MAX = 1000    # plain-text characters kept per item description
+RSS_DEFAULT_ITEMS = 10
+RSS_DEFAULT_DESCRIPTION = 300
+
+# Background prefetching of RSS and weather sources
+PREFETCH_WORKERS = int(os.environ.get('SIGNAGE_PREFETCH_WORKERS', 4))
+PREFETCH_TICK = 15           # seconds between scheduler passes
+PREFETCH_SCAN_INTERVAL = 60  # seconds between rescans of the stored configs
+PREFETCH_LEAD = 0.25         # refresh once this fraction of the TTL is left, plus jitter
+PREFETCH_LOCK_FILE = 'prefetch.lock'  # held by the one worker process that prefetches and sweeps media
+
+# Heartbeat bookkeeping
+HEARTBEAT_FLUSH_INTERVAL = int(os.environ.get('SIGNAGE_HEARTBEAT_FLUSH', 15))  # seconds
+VERSION_SYNC_INTERVAL = 2  # seconds between checks for config versions saved by other workers
+ONLINE_THRESHOLD = int(os.environ.get('SIGNAGE_ONLINE_THRESHOLD', 90))  # seconds since last heartbeat before a display is offline
+
+# Slow-request log: requests over the threshold are printed, sampled at this rate (0 disables)
+SLOW_REQUEST_MS = float(os.environ.get('SIGNAGE_SLOW_REQUEST_MS', 0))
+SLOW_REQUEST_SAMPLE = float(os.environ.get('SIGNAGE_SLOW_REQUEST_SAMPLE', 1.0))
+
+# Each worker publishes its metrics for /metrics to merge; one that hasn't
+# published for a few intervals has exited, and only its counters are kept
+METRICS_PUBLISH_INTERVAL = 10  # seconds
+METRICS_LIVE_INTERVALS = 3
+METRICS_RETENTION = 7 * 24 * 3600  # seconds an exited worker's counters are kept
+
+# Player telemetry sent with heartbeats: field -> (valid range, how buckets combine it)
+TELEMETRY_FIELDS = {
+    'fps': (0, 240, 'AVG'),            # frames per second while visible
+    'heap_mb': (0, 65536, 'MAX'),      # JS heap in use
+    'render_ms': (0, 60000, 'MAX'),    # slowest widget build or update
+    'asset_errors': (0, 100000, 'SUM'),  # images and videos that failed to load
+    'fetch_ms': (0, 600000, 'AVG'),    # mean fetch latency
+}
+# Ring buffers as (resolution in seconds, slots kept): raw heartbeats for an
+# hour, 5-minute buckets for a day, hourly buckets for a week
+TELEMETRY_RESOLUTIONS = ((30, 120), (300, 288), (3600, 168))
+
+# Zone schedules repeat weekly
+SCHEDULE_WEEK_MINUTES = 7 * 24 * 60
+
+# Fleet listing
+FLEET_PAGE_SIZE = 50
+FLEET_PAGE_MAX = 500
+
+# Server-sent config events
+EVENTS_KEEPALIVE = 25  # seconds between keepalive comments (below proxy read timeouts)
+EVENTS_RETRY_MS = 5000  # reconnect delay advertised to EventSource clients
+CONFIG_HISTORY_MAX = 100  # deltas kept per display for players catching up
+TAG_MAX_LENGTH = 64
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', secrets.token_hex(16))
@@ -30,47 +110,49 @@ app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file upload
 UPLOAD_FOLDER = 'static/uploads'
 DATABASE_FILE = 'signage.db'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+VIDEO_EXTENSIONS = {'mp4', 'm4v', 'webm', 'ogv', 'mov'}
+
+# Resumable uploads: the file size limit, and the chunk size suggested to clients
+# (each chunk is one request, so it must stay under MAX_CONTENT_LENGTH)
+UPLOAD_MAX_SIZE = int(os.environ.get('SIGNAGE_UPLOAD_MAX_MB', 2048)) * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Resized derivatives generated for uploaded images: (name, long edge, short edge)
+MEDIA_VARIANTS = (('720p', 1280, 720), ('1080p', 1920, 1080), ('4k', 3840, 2160))
+MEDIA_WEBP_QUALITY = 82
+MEDIA_WORKERS = int(os.environ.get('SIGNAGE_MEDIA_WORKERS', 2))
+
+# Uploads are stored as <sha256>.<ext>; unreferenced ones are swept after a grace period
+MEDIA_GC_INTERVAL = int(os.environ.get('SIGNAGE_MEDIA_GC_INTERVAL', 3600))  # seconds between sweeps
+MEDIA_GC_GRACE = int(os.environ.get('SIGNAGE_MEDIA_GC_GRACE', 24 * 3600))  # seconds an upload may stay unused
+MEDIA_HASHED_NAME = re.compile(r'^[0-9a-f]{64}\.[a-z0-9]+$')
+MEDIA_URL = re.compile(r'^(?:https?://[^/]+)?/(?:static/uploads|media)/([^/?#]+)')
 
 # Ensure upload directory exists
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+db.configure(DATABASE_FILE)
+
+# Fingerprinted static assets, if `python assets.py` has been run
+asset_manifest = assets.load_manifest()
+ASSET_MAX_AGE = 31536000  # fingerprinted files never change, so cache for a year
 
 def init_database():
-    """Initialize the SQLite database with required tables."""
-    conn = sqlite3.connect(DATABASE_FILE)
+    """Migrate the database to the current schema and seed a first user and display."""
+    started = time.perf_counter()
+    with db.transaction() as conn:
+        old_version, version = migrations.migrate(conn)
+        _seed_database(conn)
+    elapsed = time.perf_counter() - started
+    metrics.STARTUP_SECONDS.set(elapsed, phase='migrate')
+    if old_version != version:
+        print(f"Migrated database schema from version {old_version} to {version} in {elapsed * 1000:.0f}ms")
+    # A new server starts its counters from zero, like a single process would
+    db.shared_cache().clear('metrics')
+
+
+def _seed_database(conn):
+    """Create the default admin user and display inside the caller's transaction."""
     cursor = conn.cursor()
-    
-    # Users table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Displays table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS displays (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            description TEXT,
-            layout_config TEXT,
-            background_config TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Add columns for remote management (safe for existing DBs)
-    try:
-        cursor.execute('ALTER TABLE displays ADD COLUMN last_seen TIMESTAMP')
-    except sqlite3.OperationalError:
-        pass  # Column already exists
-    try:
-        cursor.execute('ALTER TABLE displays ADD COLUMN config_version INTEGER DEFAULT 1')
-    except sqlite3.OperationalError:
-        pass  # Column already exists
 
     # Create default admin user if none exists
     cursor.execute('SELECT COUNT(*) FROM users')
@@ -156,18 +238,20 @@ def init_database():
         })
         cursor.execute('INSERT INTO displays (name, description, layout_config, background_config) VALUES (?, ?, ?, ?)',
                       ('Demo Display', 'A showcase of widgets with a gradient background', default_layout, default_background))
-    
-    conn.commit()
-    conn.close()
 
 def allowed_file(filename):
     """Check if uploaded file has allowed extension."""
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS | VIDEO_EXTENSIONS
 
 def hash_password(password):
     """Hash password using SHA256."""
     return hashlib.sha256(password.encode()).hexdigest()
 
+@app.template_global()
+def asset_url(path):
+    """URL of a static asset, using its fingerprinted name when one has been built."""
+    return url_for('static', filename=asset_manifest.get(path, path))
+
 def require_auth(f):
     """Decorator to require authentication."""
     @wraps(f)
@@ -177,6 +261,1393 @@ def require_auth(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def telemetry_sample(data):
+    """Keep the known, in-range numeric fields of a player's telemetry report."""
+    if not isinstance(data, dict):
+        return None
+    sample = {}
+    for field, (low, high, _) in TELEMETRY_FIELDS.items():
+        value = data.get(field)
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and low <= value <= high:
+            sample[field] = value
+    return sample or None
+
+
+def store_telemetry(conn, samples):
+    """Write raw telemetry samples and refresh the buckets they fall in.
+
+    `samples` are (display_id, unix time, sample) tuples. Each coarser
+    resolution is recomputed from the one below it for the buckets touched,
+    combining each field as TELEMETRY_FIELDS says.
+    """
+    fields = tuple(TELEMETRY_FIELDS)
+    resolution, slots = TELEMETRY_RESOLUTIONS[0]
+    # Displays deleted (by any worker) since the sample arrived are skipped
+    conn.executemany(f'''
+        INSERT OR REPLACE INTO telemetry (display_id, resolution, slot, bucket, samples, {', '.join(fields)})
+        SELECT id, ?, ?, ?, 1, {', '.join('?' for _ in fields)} FROM displays WHERE id = ?
+    ''', [(resolution, stamp // resolution % slots, stamp, *(sample.get(f) for f in fields), display_id)
+          for display_id, stamp, sample in samples])
+
+    display_ids = json.dumps(sorted({display_id for display_id, _, _ in samples}))
+    earliest = min(stamp for _, stamp, _ in samples)
+    aggregates = ', '.join(f'{combine}({field})' for field, (_, _, combine) in TELEMETRY_FIELDS.items())
+    for (source, _), (resolution, slots) in zip(TELEMETRY_RESOLUTIONS, TELEMETRY_RESOLUTIONS[1:]):
+        conn.execute(f'''
+            INSERT OR REPLACE INTO telemetry (display_id, resolution, slot, bucket, samples, {', '.join(fields)})
+            SELECT display_id, :resolution, bucket / :resolution % :slots, bucket / :resolution * :resolution,
+                   SUM(samples), {aggregates}
+            FROM telemetry
+            WHERE resolution = :source AND bucket >= :since
+              AND display_id IN (SELECT value FROM json_each(:display_ids))
+            GROUP BY display_id, bucket / :resolution
+        ''', {'resolution': resolution, 'slots': slots, 'source': source,
+              'since': earliest // resolution * resolution, 'display_ids': display_ids})
+
+
+class HeartbeatRegistry:
+    """In-memory record of player heartbeats.
+
+    Pings are answered from memory: the registry keeps each display's last-seen
+    time and current config_version, and a background thread writes all pending
+    last_seen values, and any telemetry that came with the pings, back to
+    SQLite in one transaction every flush interval.
+
+    The same thread polls config_generation every few seconds and re-reads
+    the config versions when it has moved, so a save handled by another worker
+    process still reaches this worker's players.
+    """
+
+    def __init__(self, flush_interval=HEARTBEAT_FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._versions = {}   # display_id -> config_version
+        self._generation = None  # config_generation when _versions was last reloaded
+        self._last_seen = {}  # display_id -> 'YYYY-MM-DD HH:MM:SS' (UTC, as CURRENT_TIMESTAMP)
+        self._pending = {}    # display_id -> last_seen not yet written to the database
+        self._samples = []    # (display_id, unix time, telemetry) not yet written
+        self._flusher = None
+
+    def beat(self, display_id, telemetry=None):
+        """Record a heartbeat and return the display's config_version (None if unknown)."""
+        version = self.config_version(display_id)
+        if version is None:
+            return None
+        now = datetime.now(timezone.utc)
+        stamp = now.strftime('%Y-%m-%d %H:%M:%S')
+        with self._lock:
+            self._last_seen[display_id] = stamp
+            self._pending[display_id] = stamp
+            if telemetry:
+                self._samples.append((display_id, int(now.timestamp()), telemetry))
+        self.start()
+        return version
+
+    def config_version(self, display_id):
+        """Return the cached config_version, loading it from the database on a miss."""
+        with self._lock:
+            if display_id in self._versions:
+                return self._versions[display_id]
+        row = db.fetchone('SELECT config_version FROM displays WHERE id = ?', (display_id,))
+        if not row:
+            return None
+        with self._lock:
+            self._versions[display_id] = row['config_version'] or 1
+            return self._versions[display_id]
+
+    def sync_versions(self):
+        """Reload all config versions if any changed, and announce the ones that did."""
+        generation = db.fetchone('SELECT value FROM config_generation WHERE id = 0')['value']
+        if generation == self._generation:
+            return []
+        # Read after the counter, so a save committed in between is picked up
+        # now and merely triggers one more reload on the next pass
+        versions = {row['id']: row['config_version'] or 1
+                    for row in db.fetchall('SELECT id, config_version FROM displays')}
+        self._generation = generation
+        with self._lock:
+            changed = [display_id for display_id, version in self._versions.items()
+                       if versions.get(display_id) != version]
+            self._versions = versions
+        for display_id in changed:
+            config_cache.invalidate(display_id)
+            config_events.publish(display_id)
+        return changed
+
+    def invalidate(self, display_id):
+        """Drop the cached config_version so the next ping re-reads it."""
+        with self._lock:
+            self._versions.pop(display_id, None)
+
+    def last_seen(self, display_id, stored=None):
+        """Return the freshest last_seen value, preferring in-memory over `stored`."""
+        with self._lock:
+            seen = self._last_seen.get(display_id)
+        if seen and (not stored or seen > stored):
+            return seen
+        return stored
+
+    def seen_within(self, seconds):
+        """Return the ids of displays this worker has heard from in the last `seconds`."""
+        cutoff = datetime.fromtimestamp(time.time() - seconds, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        with self._lock:
+            return [display_id for display_id, stamp in self._last_seen.items() if stamp >= cutoff]
+
+    def forget(self, display_id):
+        """Remove every trace of a deleted display."""
+        with self._lock:
+            self._versions.pop(display_id, None)
+            self._last_seen.pop(display_id, None)
+            self._pending.pop(display_id, None)
+            self._samples = [s for s in self._samples if s[0] != display_id]
+
+    def flush(self):
+        """Write all pending last_seen values and telemetry in a single transaction."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            samples, self._samples = self._samples, []
+        if not pending:
+            return 0
+        try:
+            with db.transaction() as conn:
+                # Another worker may already have written a later heartbeat
+                conn.executemany("UPDATE displays SET last_seen = MAX(COALESCE(last_seen, ''), ?) WHERE id = ?",
+                                 [(stamp, display_id) for display_id, stamp in pending.items()])
+                if samples:
+                    store_telemetry(conn, samples)
+        except sqlite3.Error:
+            # Put the values back so the next flush retries them; telemetry is
+            # best-effort and dropped rather than queued without bound
+            with self._lock:
+                for display_id, stamp in pending.items():
+                    self._pending.setdefault(display_id, stamp)
+            raise
+        return len(pending)
+
+    def start(self):
+        """Start the background flush/sync thread (idempotent)."""
+        if self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._run, name='heartbeat-flush', daemon=True)
+            self._flusher.start()
+
+    def _run(self):
+        flushed_at = time.time()
+        while True:
+            time.sleep(VERSION_SYNC_INTERVAL)
+            try:
+                self.sync_versions()
+                if time.time() - flushed_at >= self.flush_interval:
+                    flushed_at = time.time()
+                    self.flush()
+            except sqlite3.Error as e:
+                print(f"Heartbeat flush failed: {e}")
+
+
+heartbeats = HeartbeatRegistry()
+atexit.register(heartbeats.flush)
+
+
+class ConfigCache:
+    """Parsed display configs and their rendered payloads.
+
+    Entries are keyed by (display_id, config_version), so a saved config is
+    picked up as soon as the version moves on. Each rendered payload carries a
+    strong ETag derived from its bytes, letting unchanged players revalidate
+    with a 304 instead of re-downloading.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # (display_id, config_version) -> entry
+
+    def get(self, display_id):
+        """Return the entry for the display's current version, or None if it doesn't exist.
+
+        Raises json.JSONDecodeError if the stored config is invalid.
+        """
+        version = heartbeats.config_version(display_id)
+        if version is None:
+            return None
+        with self._lock:
+            entry = self._entries.get((display_id, version))
+        metrics.CACHE_LOOKUPS.inc(cache='config', result='hit' if entry else 'miss')
+        return entry or self._load(display_id)
+
+    def payload(self, entry, kind, render):
+        """Return (body, etag) for one representation of an entry, rendering it once."""
+        with self._lock:
+            cached = entry['payloads'].get(kind)
+        if cached is None:
+            body = render(entry)
+            if isinstance(body, str):
+                body = body.encode('utf-8')
+            cached = (body, hashlib.sha256(body).hexdigest()[:32])
+            with self._lock:
+                entry['payloads'][kind] = cached
+        return cached
+
+    def timeline(self, entry):
+        """Return the entry's compiled schedule timeline, compiling it once."""
+        with self._lock:
+            timeline = entry.get('timeline')
+        if timeline is None:
+            timeline = compile_schedule(entry['display_data']['layout_config'])
+            with self._lock:
+                entry['timeline'] = timeline
+        return timeline
+
+    def invalidate(self, display_id):
+        """Drop every cached version of a display."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == display_id]:
+                del self._entries[key]
+
+    def _load(self, display_id):
+        display = db.fetchone('SELECT * FROM displays WHERE id = ?', (display_id,))
+        if not display:
+            return None
+        entry = {
+            'version': display['config_version'] or 1,
+            'display': dict(display),
+            'display_data': {
+                'id': display['id'],
+                'name': display['name'],
+                'description': display['description'],
+                'config_version': display['config_version'] or 1,
+                'layout_config': json.loads(display['layout_config']),
+                'background_config': json.loads(display['background_config'])
+            },
+            'payloads': {}
+        }
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == display_id]:
+                del self._entries[key]
+            self._entries[(display_id, entry['version'])] = entry
+        return entry
+
+
+config_cache = ConfigCache()
+
+
+# Fields of a display that config writes may change
+CONFIG_FIELDS = ('name', 'description', 'layout_config', 'background_config')
+
+
+def config_delta(old, new, path=()):
+    """List the set/remove operations that turn `old` into `new`.
+
+    Objects are compared key by key and equal-length lists item by item, so
+    editing one zone's text yields a single small operation. Anything else
+    that differs is replaced whole.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = [{'op': 'remove', 'path': [*path, key]} for key in old if key not in new]
+        for key, value in new.items():
+            if key in old:
+                ops.extend(config_delta(old[key], value, (*path, key)))
+            else:
+                ops.append({'op': 'set', 'path': [*path, key], 'value': value})
+        return ops
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        ops = []
+        for index, (a, b) in enumerate(zip(old, new)):
+            ops.extend(config_delta(a, b, (*path, index)))
+        return ops
+    if type(old) is type(new) and old == new:
+        return []
+    return [{'op': 'set', 'path': list(path), 'value': new}]
+
+
+def merge_patch(target, patch):
+    """Apply a JSON merge patch (RFC 7396) to `target` and return the result.
+
+    As an extension, an object patches a list by index, so
+    {"zones": {"3": {"content": "..."}}} edits only the fourth zone.
+    Raises ValueError for a bad list index.
+    """
+    if not isinstance(patch, dict):
+        return patch
+    if isinstance(target, list):
+        result = list(target)
+        for key, value in patch.items():
+            try:
+                index = int(key)
+                if index < 0:
+                    raise IndexError
+                result[index] = merge_patch(result[index], value)
+            except (ValueError, IndexError):
+                raise ValueError(f'No list item {key!r} to patch')
+        return result
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = merge_patch(result.get(key), value)
+    return result
+
+
+def check_config_patch(patch):
+    """Raise ValueError for top-level values a display config can't be patched to.
+
+    Null deletes keys inside the configs, but a whole config is patched with
+    an object and the name can't be removed.
+    """
+    if 'name' in patch and not patch['name']:
+        raise ValueError('name cannot be empty')
+    for field in ('layout_config', 'background_config'):
+        if field in patch and not isinstance(patch[field], dict):
+            raise ValueError(f'{field} must be an object; use null inside it to delete keys')
+
+
+def media_references(config):
+    """Return the upload filenames a display config may point at.
+
+    Uploads appear as /static/uploads/ or /media/ URLs, or as bare filenames
+    in image, video and slideshow content (one per line). Names that are not
+    known uploads are dropped when they are matched against media.
+    """
+    names = set()
+    stack = [config]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+        elif isinstance(value, str):
+            for line in value.splitlines():
+                line = line.strip()
+                match = MEDIA_URL.match(line)
+                if match:
+                    names.add(urllib.parse.unquote(match.group(1)))
+                elif line and '/' not in line and len(line) <= 255:
+                    names.add(line)
+    return names
+
+
+def update_media_refs(conn, display_id, config):
+    """Replace a display's media_refs rows with the uploads `config` uses."""
+    conn.execute('DELETE FROM media_refs WHERE display_id = ?', (display_id,))
+    names = media_references(config)
+    if names:
+        conn.execute('''
+            INSERT INTO media_refs (media_id, display_id)
+            SELECT id, ? FROM media WHERE filename IN (SELECT value FROM json_each(?))
+        ''', (display_id, json.dumps(sorted(names))))
+
+
+def save_display_config(conn, display_id, update):
+    """Apply `update` to a display's config inside the caller's transaction.
+
+    `update` receives the current {name, description, layout_config,
+    background_config} and returns the new one. A change bumps config_version
+    and records its delta in config_history. Returns (version, delta), or None
+    if the display doesn't exist; delta is empty when nothing changed.
+    """
+    row = conn.execute('SELECT * FROM displays WHERE id = ?', (display_id,)).fetchone()
+    if not row:
+        return None
+    current = {
+        'name': row['name'],
+        'description': row['description'],
+        'layout_config': json.loads(row['layout_config'] or '{}'),
+        'background_config': json.loads(row['background_config'] or '{}')
+    }
+    version = row['config_version'] or 1
+    new = update(current)
+    new = {
+        'name': new.get('name'),
+        'description': new.get('description'),
+        'layout_config': new.get('layout_config') or {},
+        'background_config': new.get('background_config') or {}
+    }
+    delta = config_delta(current, new)
+    if not delta:
+        return version, delta
+
+    version += 1
+    conn.execute('''
+        UPDATE displays
+        SET name = ?, description = ?, layout_config = ?, background_config = ?,
+            updated_at = CURRENT_TIMESTAMP, config_version = ?
+        WHERE id = ?
+    ''', (new['name'], new['description'], json.dumps(new['layout_config']),
+          json.dumps(new['background_config']), version, display_id))
+    update_media_refs(conn, display_id, [new['layout_config'], new['background_config']])
+    conn.execute('INSERT OR REPLACE INTO config_history (display_id, version, delta) VALUES (?, ?, ?)',
+                 (display_id, version, json.dumps(delta)))
+    conn.execute('DELETE FROM config_history WHERE display_id = ? AND version <= ?',
+                 (display_id, version - CONFIG_HISTORY_MAX))
+    return version, delta
+
+
+def config_changed(display_id):
+    """Tell the caches and connected players that a display's config moved on."""
+    heartbeats.invalidate(display_id)
+    config_cache.invalidate(display_id)
+    config_events.publish(display_id)
+
+
+def config_deltas(display_id, from_version, to_version):
+    """Return the changes between two versions, or None if history doesn't cover them."""
+    if from_version == to_version:
+        return []
+    if from_version > to_version:
+        return None
+    rows = db.fetchall('''
+        SELECT delta FROM config_history
+        WHERE display_id = ? AND version > ? AND version <= ?
+        ORDER BY version
+    ''', (display_id, from_version, to_version))
+    if len(rows) != to_version - from_version:
+        return None
+    changes = []
+    for row in rows:
+        changes.extend(json.loads(row['delta']))
+    return changes
+
+
+def schedule_minutes(value):
+    """Parse 'HH:MM' into minutes since midnight, or None if it isn't a time."""
+    try:
+        hours, minutes = (int(part) for part in str(value).split(':')[:2])
+    except ValueError:
+        return None
+    return hours * 60 + minutes
+
+
+def compile_schedule(layout):
+    """Compile each zone's schedule into a weekly timeline of transitions.
+
+    Returns {zone index: [[minute of week, entry index or None], ...]}, where
+    minute 0 is Sunday 00:00 in the display's local time (days as in JS
+    getDay) and None means the zone's own content. Each timeline starts at 0
+    and lists only the minutes where what plays changes. Where entries
+    overlap the first one in the list wins, as the player always did; entries
+    whose end is not after their start never match.
+    """
+    timelines = {}
+    for index, zone in enumerate(layout.get('zones') or []):
+        intervals = []  # (start, end, entry index), minutes of week
+        for position, entry in enumerate(zone.get('schedule') or []):
+            if not isinstance(entry, dict):
+                continue
+            start, end = schedule_minutes(entry.get('time_start')), schedule_minutes(entry.get('time_end'))
+            if start is None or end is None or end <= start:
+                continue
+            days = entry.get('days')
+            if not isinstance(days, list) or not days:
+                days = range(7)  # no days selected means every day
+            days = {d for d in days if isinstance(d, int) and 0 <= d <= 6}
+            intervals.extend((day * 1440 + start, day * 1440 + end, position) for day in days)
+        if not intervals:
+            continue
+
+        transitions = []
+        for minute in sorted({0} | {i[0] for i in intervals} | {i[1] for i in intervals}):
+            if minute >= SCHEDULE_WEEK_MINUTES:
+                continue
+            playing = min((i[2] for i in intervals if i[0] <= minute < i[1]), default=None)
+            if not transitions or transitions[-1][1] != playing:
+                transitions.append([minute, playing])
+        timelines[index] = transitions
+    return timelines
+
+
+def minute_of_week(moment):
+    """Minutes since Sunday 00:00 for a wall-clock datetime."""
+    return (moment.weekday() + 1) % 7 * 1440 + moment.hour * 60 + moment.minute
+
+
+def playing_at(entry, moment):
+    """What each zone of a cached display shows at wall-clock time `moment`."""
+    layout = entry['display_data']['layout_config']
+    timelines = config_cache.timeline(entry)
+    minute = minute_of_week(moment)
+    zones = []
+    for index, zone in enumerate(layout.get('zones') or []):
+        playing = None
+        transitions = timelines.get(index)
+        if transitions:
+            playing = transitions[bisect.bisect_right([t[0] for t in transitions], minute) - 1][1]
+        scheduled = zone['schedule'][playing] if playing is not None else {}
+        zones.append({
+            'zone': index,
+            'type': zone.get('type'),
+            'content': scheduled['content'] if scheduled.get('content') is not None else zone.get('content'),
+            'schedule_entry': playing,
+            'label': scheduled.get('label')
+        })
+    return zones
+
+
+class ConfigEvents:
+    """Wakes players waiting on a display's event stream when its config changes.
+
+    Each display has its own condition and generation counter, so a save only
+    wakes the streams for that display. Waiting streams hold no database
+    connection; under a cooperative worker (gevent) they cost a greenlet each
+    rather than a thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels = {}  # display_id -> [Condition, generation]
+
+    def _channel(self, display_id):
+        with self._lock:
+            channel = self._channels.get(display_id)
+            if channel is None:
+                channel = self._channels[display_id] = [threading.Condition(), 0]
+            return channel
+
+    def generation(self, display_id):
+        return self._channel(display_id)[1]
+
+    def publish(self, display_id):
+        """Signal that a display's config has changed (or the display is gone)."""
+        channel = self._channel(display_id)
+        with channel[0]:
+            channel[1] += 1
+            channel[0].notify_all()
+
+    def wait(self, display_id, generation, timeout):
+        """Block until the generation moves past `generation` or `timeout` elapses."""
+        channel = self._channel(display_id)
+        with channel[0]:
+            channel[0].wait_for(lambda: channel[1] != generation, timeout)
+            return channel[1]
+
+
+config_events = ConfigEvents()
+
+
+class FeedCache:
+    """Shared cache of parsed RSS feeds keyed by URL.
+
+    Fresh entries are served straight from memory; on a local miss the
+    cross-process SharedCache is consulted before going upstream, and every
+    fetch is written back to it for the other workers. Expired entries are served
+    stale while a single background refresh revalidates them upstream with the
+    stored ETag/Last-Modified, and stay in service if the upstream fails.
+    Concurrent requests for a feed that has never been fetched wait on one
+    shared fetch instead of each starting their own.
+    """
+
+    def __init__(self, ttl=RSS_CACHE_TTL, max_feeds=RSS_CACHE_MAX_FEEDS):
+        self.ttl = ttl
+        self.max_feeds = max_feeds
+        self._lock = threading.Lock()
+        self._entries = {}   # url -> {'data', 'expires', 'etag', 'modified'}
+        self._inflight = {}  # url -> threading.Event set when the fetch finishes
+        self._views = OrderedDict()  # (url, count, desc, titles_only) -> (data, (body, etag))
+
+    def get(self, url):
+        """Return the shaped feed for `url`, fetching it if nothing usable is cached."""
+        with self._lock:
+            entry = self._entries.get(url)
+        if not entry or time.time() >= entry['expires']:
+            entry = self._adopt_shared(url, entry)
+
+        with self._lock:
+            if entry and time.time() < entry['expires']:
+                metrics.CACHE_LOOKUPS.inc(cache='rss', result='hit')
+                return entry['data']
+            done = self._inflight.get(url)
+            leader = done is None
+            if leader:
+                done = self._inflight[url] = threading.Event()
+
+        metrics.CACHE_LOOKUPS.inc(cache='rss', result='stale' if entry else 'miss')
+        if entry:
+            # Serve stale content; refresh in the background if nobody else is
+            if leader:
+                threading.Thread(target=self._refresh, args=(url, done), daemon=True).start()
+            return entry['data']
+
+        if leader:
+            self._refresh(url, done)
+        else:
+            done.wait(30)
+        with self._lock:
+            entry = self._entries.get(url)
+        if not entry:
+            raise RuntimeError(f'Feed could not be fetched: {url}')
+        return entry['data']
+
+    def view(self, url, count, desc, titles_only):
+        """Return (body, etag) for a trimmed rendering of a feed, built once per fetch."""
+        data = self.get(url)
+        key = (url, count, desc, titles_only)
+        with self._lock:
+            cached = self._views.get(key)
+            if cached and cached[0] is data:
+                self._views.move_to_end(key)
+                return cached[1]
+        body = json.dumps(feed_view(data, count, desc, titles_only)).encode('utf-8')
+        rendered = (body, hashlib.sha256(body).hexdigest()[:32])
+        with self._lock:
+            self._views[key] = (data, rendered)
+            self._views.move_to_end(key)
+            while len(self._views) > self.max_feeds * 4:
+                self._views.popitem(last=False)
+        return rendered
+
+    def expires(self, url):
+        """Return when the cached copy of `url` goes stale, or None if not cached."""
+        with self._lock:
+            entry = self._entries.get(url)
+        if not entry:
+            entry = self._adopt_shared(url, None)
+        return entry['expires'] if entry else None
+
+    def _adopt_shared(self, url, entry):
+        """Replace the local entry with the shared one if another worker fetched more recently."""
+        shared = db.shared_cache().get('rss', url)
+        if shared and (entry is None or shared[1] > entry['expires']):
+            entry = dict(shared[0], expires=shared[1])
+            self._store(url, entry)
+        return entry
+
+    def _store(self, url, entry):
+        with self._lock:
+            if url not in self._entries and len(self._entries) >= self.max_feeds:
+                oldest = min(self._entries, key=lambda k: self._entries[k]['expires'])
+                del self._entries[oldest]
+            self._entries[url] = entry
+
+    def _publish(self, url, entry):
+        db.shared_cache().set('rss', url, {k: v for k, v in entry.items() if k != 'expires'},
+                              entry['expires'])
+
+    def refresh(self, url):
+        """Revalidate a feed now unless a fetch for it is already running."""
+        with self._lock:
+            if url in self._inflight:
+                return
+            done = self._inflight[url] = threading.Event()
+        self._refresh(url, done)
+
+    def _refresh(self, url, done):
+        try:
+            with self._lock:
+                entry = self._entries.get(url)
+            self._fetch(url, entry)
+        finally:
+            with self._lock:
+                self._inflight.pop(url, None)
+            done.set()
+
+    @staticmethod
+    def _download(url, entry):
+        """Fetch a feed's bytes, revalidating against `entry`; returns (status, body, headers).
+
+        The whole download is bounded by RSS_FETCH_TIMEOUT, not just each read,
+        so an upstream that hangs or trickles can't hold the in-flight marker.
+        """
+        headers = {'User-Agent': 'DigitalSignage/1.0'}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('modified'):
+            headers['If-Modified-Since'] = entry['modified']
+        deadline = time.monotonic() + RSS_FETCH_TIMEOUT
+        req = urllib.request.Request(url, headers=headers)
+        try:
+            with urllib.request.urlopen(req, timeout=RSS_FETCH_TIMEOUT) as resp:
+                body = bytearray()
+                for chunk in iter(lambda: resp.read1(64 * 1024), b''):
+                    body += chunk
+                    if len(body) > RSS_MAX_BYTES:
+                        raise ValueError(f'feed is larger than {RSS_MAX_BYTES} bytes')
+                    if time.monotonic() > deadline:
+                        raise TimeoutError(f'feed took longer than {RSS_FETCH_TIMEOUT}s')
+                response_headers = {k.lower(): v for k, v in resp.headers.items()}
+                response_headers.setdefault('content-location', resp.url)
+                return resp.status, bytes(body), response_headers
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return 304, b'', {}
+            raise
+
+    def _fetch(self, url, entry):
+        import feedparser  # ~20ms to import, so only paid once a feed is actually fetched
+
+        now = time.time()
+        started = time.perf_counter()
+        status, headers = None, {}
+        try:
+            status, body, headers = self._download(url, entry)
+            feed = feedparser.parse(body, response_headers=headers) if status != 304 else None
+        except Exception as e:
+            print(f"RSS fetch failed for {url}: {e}")
+            feed = None
+
+        if status == 304:
+            outcome = 'not_modified'
+        else:
+            outcome = 'error' if feed is None or (feed.bozo and not feed.entries) else 'ok'
+        metrics.UPSTREAM_SECONDS.observe(time.perf_counter() - started, upstream='rss', outcome=outcome)
+
+        if entry and status == 304:
+            with self._lock:
+                entry['expires'] = now + self.ttl
+            self._publish(url, entry)
+            return
+
+        if feed is None or (feed.bozo and not feed.entries):
+            # Keep serving what we have and try again shortly
+            if entry:
+                with self._lock:
+                    entry['expires'] = now + RSS_RETRY_INTERVAL
+                return
+            if feed is None:
+                return
+            ttl = RSS_RETRY_INTERVAL
+        else:
+            ttl = self.ttl
+
+        # Normalise once here so players get plain, bounded text
+        items = []
+        for item in feed.entries[:RSS_MAX_ITEMS]:
+            items.append({
+                'title': html_to_text(item.get('title', '')),
+                'description': truncate_text(html_to_text(item.get('description', '')), RSS_DESCRIPTION_MAX),
+                'link': item.get('link', ''),
+                'published': feed_date(item)
+            })
+        new_entry = {
+            'data': {'title': html_to_text(feed.feed.get('title', '')), 'items': items},
+            'expires': now + ttl,
+            'etag': headers.get('etag'),
+            'modified': headers.get('last-modified')
+        }
+        self._store(url, new_entry)
+        self._publish(url, new_entry)
+
+
+feed_cache = FeedCache()
+
+
+class _TextExtractor(HTMLParser):
+    """Collects the text of an HTML fragment, with block tags as spaces."""
+
+    BLOCK_TAGS = {'br', 'p', 'div', 'li', 'tr', 'td', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote'}
+    SKIP_TAGS = {'script', 'style'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skipping += 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skipping = max(self._skipping - 1, 0)
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_data(self, data):
+        if not self._skipping:
+            self.parts.append(data)
+
+
+def html_to_text(fragment):
+    """Strip tags and entities from an HTML fragment and collapse whitespace."""
+    parser = _TextExtractor()
+    parser.feed(fragment or '')
+    parser.close()
+    return ' '.join(''.join(parser.parts).split())
+
+
+def truncate_text(text, limit):
+    """Shorten text to at most `limit` characters, at a word boundary where possible."""
+    if len(text) <= limit:
+        return text
+    cut = text[:limit - 1]
+    if ' ' in cut:
+        cut = cut.rsplit(' ', 1)[0]
+    return cut.rstrip(' ,;:-') + '…'
+
+
+def feed_date(item):
+    """Return an item's publication time as ISO 8601 UTC, or '' if it has none."""
+    parsed = item.get('published_parsed') or item.get('updated_parsed')
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', parsed) if parsed else ''
+
+
+def feed_view(data, count, desc, titles_only):
+    """Trim a cached feed to what one widget shows."""
+    items = data['items'][:count]
+    if titles_only:
+        items = [{'title': item['title']} for item in items]
+    elif desc:
+        items = [dict(item, description=truncate_text(item['description'], desc)) for item in items]
+    else:
+        items = [{k: v for k, v in item.items() if k != 'description'} for item in items]
+    return {'title': data['title'], 'items': items}
+
+
+class LeaderLock:
+    """An exclusive flock that one worker process takes and keeps until it exits.
+
+    Background jobs that should run in only one process check held() before
+    each pass. The first process to ask becomes the leader, and another takes
+    over on its next check once the leader is gone.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def held(self):
+        """Try to become (or stay) the leading process."""
+        with self._lock:
+            if self._file is not None:
+                return True
+            try:
+                import fcntl
+            except ImportError:
+                return True  # no flock (Windows): single-process dev server only
+            lock_file = open(self.path, 'a')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+            self._file = lock_file
+            return True
+
+
+background_leader = LeaderLock(PREFETCH_LOCK_FILE)
+
+
+class Prefetcher:
+    """Keeps the RSS and weather caches warm for every source in a stored config.
+
+    A scheduler thread rescans the display layouts, dedupes their feed URLs and
+    weather locations, and hands each source to a bounded worker pool shortly
+    before its cache entry expires. The refresh point is jittered so that
+    sources cached together are not all refetched together.
+
+    Every worker process runs a scheduler, but only the background_leader
+    does any work; the others take over if that process exits. Results reach
+    all workers through the SharedCache.
+    """
+
+    def __init__(self, workers=PREFETCH_WORKERS):
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._sources = set()
+        self._scanned_at = 0
+        self._due = {}          # source -> time its next refresh is due
+        self._running = set()   # sources currently queued or being fetched
+        self._executor = None
+        self._thread = None
+
+    @staticmethod
+    def scan():
+        """Return the distinct ('rss', url) and ('weather', key) sources in use."""
+        sources = set()
+        for row in db.fetchall('SELECT layout_config FROM displays'):
+            try:
+                layout = json.loads(row['layout_config'] or '{}')
+            except json.JSONDecodeError:
+                continue
+            # Saved configs aren't validated, so skip anything of the wrong shape
+            zones = layout.get('zones') if isinstance(layout, dict) else None
+            for zone in zones if isinstance(zones, list) else []:
+                if not isinstance(zone, dict):
+                    continue
+                if zone.get('type') == 'rss':
+                    schedule = zone.get('schedule') if isinstance(zone.get('schedule'), list) else []
+                    urls = [zone.get('content')] + [e.get('content') for e in schedule if isinstance(e, dict)]
+                    sources.update(('rss', url) for url in urls if url and isinstance(url, str))
+                elif zone.get('type') == 'weather' and zone.get('weather_lat') and zone.get('weather_lon'):
+                    try:
+                        sources.add(('weather', weather_key(zone['weather_lat'], zone['weather_lon'],
+                                                            zone.get('weather_units') or 'C')))
+                    except (TypeError, ValueError):
+                        continue
+        return sources
+
+    def start(self):
+        """Start the scheduler thread and worker pool (idempotent)."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='prefetch')
+            self._thread = threading.Thread(target=self._run, name='prefetch-scheduler', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                if background_leader.held():
+                    self.tick()
+            except Exception as e:
+                print(f"Prefetch pass failed: {e}")
+            time.sleep(PREFETCH_TICK)
+
+    def tick(self):
+        """Queue a refresh for every source that is missing or close to expiry."""
+        now = time.time()
+        if now - self._scanned_at >= PREFETCH_SCAN_INTERVAL:
+            self._sources = self.scan()
+            self._scanned_at = now
+            db.shared_cache().purge(now - 24 * 3600)
+            self._due = {source: due for source, due in self._due.items() if source in self._sources}
+
+        due_weather = []
+        for source in self._sources:
+            if now < self._due.get(source, 0):
+                continue
+            expires, ttl = self._expiry(source)
+            if expires is not None:
+                due = expires - ttl * PREFETCH_LEAD * (1 + random.random())
+                if now < due:
+                    self._due[source] = due
+                    continue
+            with self._lock:
+                if source in self._running:
+                    continue
+                self._running.add(source)
+            self._due[source] = now + PREFETCH_TICK
+            if source[0] == 'weather':
+                due_weather.append(source)
+            else:
+                self._executor.submit(self._refresh, [source])
+
+        # Weather locations are refreshed many per upstream call
+        for i in range(0, len(due_weather), WEATHER_BATCH_SIZE):
+            self._executor.submit(self._refresh, due_weather[i:i + WEATHER_BATCH_SIZE])
+
+    @staticmethod
+    def _expiry(source):
+        if source[0] == 'rss':
+            return feed_cache.expires(source[1]), feed_cache.ttl
+        return weather_cache.expires(source[1]), weather_cache.ttl
+
+    def _refresh(self, sources):
+        try:
+            if sources[0][0] == 'rss':
+                feed_cache.refresh(sources[0][1])
+            else:
+                refresh_weather([source[1] for source in sources])
+        except Exception as e:
+            print(f"Prefetch of {sources} failed: {e}")
+        finally:
+            with self._lock:
+                self._running.difference_update(sources)
+
+
+prefetcher = Prefetcher()
+
+
+def run_off_loop(function, *args):
+    """Call function on a real OS thread when gevent has patched threading.
+
+    Under gevent, threads are greenlets, so CPU-bound work such as decoding
+    an image or hashing a large video would hold the worker's event loop,
+    stalling heartbeats and event streams until it finished. Pillow and
+    hashlib release the GIL while they work, so gevent's native threadpool
+    keeps the loop free.
+    """
+    try:
+        from gevent import get_hub, monkey
+    except ImportError:
+        return function(*args)
+    if not monkey.is_module_patched('threading'):
+        return function(*args)
+    return get_hub().threadpool.apply(function, args)
+
+
+class MediaPipeline:
+    """Generates resized WebP derivatives of uploaded images on a worker pool.
+
+    Each variant in MEDIA_VARIANTS is produced only when the original is larger
+    than it, and is recorded in media_variants so /media can hand players the
+    smallest file that still fills their zone or screen. Pillow is imported on
+    first use; without it uploads are kept as originals only.
+    """
+
+    def __init__(self, workers=MEDIA_WORKERS):
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def submit(self, media_id, filename):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='media')
+        return self._executor.submit(self.process, media_id, filename)
+
+    def process(self, media_id, filename):
+        """Build and record all variants for one upload."""
+        try:
+            variants, size = run_off_loop(self._resize, filename)
+        except Exception as e:
+            print(f"Media processing failed for {filename}: {e}")
+            db.execute("UPDATE media SET status = 'failed' WHERE id = ?", (media_id,))
+            return
+
+        with db.transaction() as conn:
+            conn.executemany('''
+                INSERT OR REPLACE INTO media_variants (media_id, name, filename, width, height, bytes)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', [(media_id,) + v for v in variants])
+            conn.execute("UPDATE media SET width = ?, height = ?, status = 'ready' WHERE id = ?",
+                         (size[0], size[1], media_id))
+
+    @staticmethod
+    def _resize(filename):
+        try:
+            from PIL import Image, ImageOps
+        except ImportError:
+            return [], (None, None)
+
+        path = os.path.join(UPLOAD_FOLDER, filename)
+        stem = os.path.splitext(filename)[0]
+        variants = []
+        with Image.open(path) as original:
+            if getattr(original, 'is_animated', False):
+                return [], original.size  # keep animations as uploaded
+            image = ImageOps.exif_transpose(original)
+            width, height = image.size
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+            for name, long_edge, short_edge in MEDIA_VARIANTS:
+                box = (long_edge, short_edge) if width >= height else (short_edge, long_edge)
+                if width <= box[0] and height <= box[1]:
+                    break  # the original already fits; larger buckets would only upscale
+                resized = image.copy()
+                resized.thumbnail(box, Image.LANCZOS)
+                variant = f'{stem}.{name}.webp'
+                variant_path = os.path.join(UPLOAD_FOLDER, variant)
+                resized.save(variant_path, 'WEBP', quality=MEDIA_WEBP_QUALITY, method=4)
+                variants.append((name, variant, resized.width, resized.height,
+                                 os.path.getsize(variant_path)))
+        return variants, (width, height)
+
+
+media_pipeline = MediaPipeline()
+
+
+def store_upload(stream, extension):
+    """Save an upload under its content hash; returns (media_id, filename).
+
+    The bytes are hashed while they are written to a temporary file, so a
+    duplicate costs one read and is then discarded.
+    """
+    digest = hashlib.sha256()
+    with tempfile.NamedTemporaryFile(dir=UPLOAD_FOLDER, prefix='.upload-', delete=False) as temp:
+        for chunk in iter(lambda: stream.read(64 * 1024), b''):
+            digest.update(chunk)
+            temp.write(chunk)
+    return commit_upload(temp.name, digest.hexdigest(), extension)
+
+
+def commit_upload(temp_path, digest, extension):
+    """Move a fully received file into the content store; returns (media_id, filename).
+
+    Moving the file into place and recording it happen under the write lock,
+    which keeps them ordered with the sweeper: an upload it is about to
+    collect is either re-armed here or stored again afterwards. The temporary
+    file is gone when this returns.
+    """
+    extension = 'jpg' if extension == 'jpeg' else extension
+    filename = f'{digest}.{extension}'
+    path = os.path.join(UPLOAD_FOLDER, filename)
+    video = extension in VIDEO_EXTENSIONS
+
+    try:
+        with db.transaction() as conn:
+            row = conn.execute('SELECT id FROM media WHERE filename = ?', (filename,)).fetchone()
+            if row and os.path.exists(path):
+                # Restart the grace period so an unused copy isn't swept mid-edit
+                conn.execute('UPDATE media SET created_at = CURRENT_TIMESTAMP WHERE id = ?', (row['id'],))
+                return row['id'], filename
+            os.replace(temp_path, path)
+            if row:
+                return row['id'], filename
+            # Videos are served as uploaded; only images get resized variants
+            media_id = conn.execute('INSERT INTO media (filename, status) VALUES (?, ?)',
+                                    (filename, 'ready' if video else 'pending')).lastrowid
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    if not video:
+        # Derivatives are generated off the request thread
+        media_pipeline.submit(media_id, filename)
+    return media_id, filename
+
+
+def upload_path(upload_id):
+    """Where the bytes of a resumable upload accumulate."""
+    return os.path.join(UPLOAD_FOLDER, f'.upload-{upload_id}')
+
+
+def file_digest(path):
+    """SHA-256 of a file on disk, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MediaSweeper:
+    """Deletes uploads that no display config refers to any more.
+
+    Each pass rebuilds media_refs from the stored layouts and backgrounds,
+    then removes media older than MEDIA_GC_GRACE with no references, along
+    with their variants, and expires resumable uploads idle for as long. The
+    grace period covers files uploaded in the editor but not saved yet. Only
+    the background_leader process sweeps.
+    """
+
+    def __init__(self, interval=MEDIA_GC_INTERVAL, grace=MEDIA_GC_GRACE):
+        self.interval = interval
+        self.grace = grace
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """Start the sweeper thread (idempotent)."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='media-sweeper', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            if not background_leader.held():
+                continue
+            try:
+                removed, freed = self.sweep()
+                if removed:
+                    print(f"Media sweep removed {removed} files ({freed} bytes)")
+            except Exception as e:
+                print(f"Media sweep failed: {e}")
+
+    def sweep(self):
+        """Collect unreferenced media; returns (files removed, bytes freed)."""
+        removed = freed = 0
+        with db.transaction() as conn:
+            conn.execute('DELETE FROM media_refs')
+            for row in conn.execute('SELECT id, layout_config, background_config FROM displays').fetchall():
+                try:
+                    config = [json.loads(row['layout_config'] or '{}'), json.loads(row['background_config'] or '{}')]
+                except json.JSONDecodeError:
+                    config = [row['layout_config'], row['background_config']]
+                update_media_refs(conn, row['id'], config)
+
+            victims = conn.execute('''
+                SELECT id, filename FROM media
+                WHERE created_at < datetime('now', ?)
+                  AND NOT EXISTS (SELECT 1 FROM media_refs WHERE media_refs.media_id = media.id)
+            ''', (f'-{self.grace} seconds',)).fetchall()
+            for victim in victims:
+                files = [victim['filename']] + [v['filename'] for v in conn.execute(
+                    'SELECT filename FROM media_variants WHERE media_id = ?', (victim['id'],))]
+                conn.execute('DELETE FROM media WHERE id = ?', (victim['id'],))
+                for filename in files:
+                    path = os.path.join(UPLOAD_FOLDER, filename)
+                    try:
+                        size = os.path.getsize(path)
+                        os.remove(path)
+                    except FileNotFoundError:
+                        continue
+                    removed += 1
+                    freed += size
+
+            # Resumable uploads abandoned for longer than the grace period
+            conn.execute("DELETE FROM uploads WHERE updated_at < datetime('now', ?)", (f'-{self.grace} seconds',))
+
+        # Temporary files left by uploads that died mid-transfer or were abandoned
+        cutoff = time.time() - self.grace
+        with os.scandir(UPLOAD_FOLDER) as entries:
+            for entry in entries:
+                if entry.name.startswith('.upload-') and entry.stat().st_mtime < cutoff:
+                    try:
+                        os.remove(entry.path)
+                    except FileNotFoundError:
+                        continue
+        return removed, freed
+
+
+media_sweeper = MediaSweeper()
+
+
+class WeatherCache:
+    """Size-capped LRU of shaped weather results with TTL expiry.
+
+    Keys come from weather_key(), so nearby coordinates and differently
+    formatted numbers share one entry. Local misses fall back to the
+    cross-process SharedCache, and every refresh is written through to it.
+    """
+
+    def __init__(self, ttl=WEATHER_CACHE_TTL, max_entries=WEATHER_CACHE_MAX):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires, data)
+
+    def get(self, key):
+        """Return fresh data for `key`, or None if missing or expired."""
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and time.time() < cached[0]:
+                self._entries.move_to_end(key)
+                metrics.CACHE_LOOKUPS.inc(cache='weather', result='hit')
+                return cached[1]
+        cached = self._adopt_shared(key)
+        if cached is not None and time.time() < cached[0]:
+            metrics.CACHE_LOOKUPS.inc(cache='weather', result='shared_hit')
+            return cached[1]
+        metrics.CACHE_LOOKUPS.inc(cache='weather', result='miss')
+        return None
+
+    def expires(self, key):
+        """Return when the entry for `key` goes stale, or None if not cached."""
+        with self._lock:
+            cached = self._entries.get(key)
+        if cached is None:
+            cached = self._adopt_shared(key)
+        return cached[0] if cached else None
+
+    def put(self, key, data):
+        expires = time.time() + self.ttl
+        self._store(key, (expires, data))
+        db.shared_cache().set('weather', self._shared_key(key), data, expires)
+
+    def _adopt_shared(self, key):
+        shared = db.shared_cache().get('weather', self._shared_key(key))
+        if shared is None:
+            return None
+        cached = (shared[1], shared[0])
+        self._store(key, cached)
+        return cached
+
+    def _store(self, key, cached):
+        with self._lock:
+            self._entries[key] = cached
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def _shared_key(key):
+        return '{},{},{}'.format(*key)
+
+
+weather_cache = WeatherCache()
+
+
+class MetricsPublisher:
+    """Copies this process's metrics into the SharedCache for /metrics to merge."""
+
+    def __init__(self, interval=METRICS_PUBLISH_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._thread = None
+        self._worker = None  # (pid, name); the name outlives the pid being reused
+
+    def start(self):
+        """Start the publishing thread (idempotent)."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='metrics-publisher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.publish()
+            except sqlite3.Error as e:
+                print(f"Metrics publish failed: {e}")
+            time.sleep(self.interval)
+
+    def publish(self):
+        now = time.time()
+        if self._worker is None or self._worker[0] != os.getpid():
+            self._worker = (os.getpid(), f'{os.getpid()}-{int(now)}')
+        db.shared_cache().set('metrics', self._worker[1],
+                              {'published': now, 'metrics': metrics.snapshot()}, now + METRICS_RETENTION)
+
+    def snapshots(self):
+        """Return [(worker, live, snapshot)] for every worker, with this one up to date."""
+        self.publish()
+        cutoff = time.time() - self.interval * METRICS_LIVE_INTERVALS
+        return [(worker, value['published'] >= cutoff, value['metrics'])
+                for worker, value, _ in db.shared_cache().entries('metrics')]
+
+
+metrics_publisher = MetricsPublisher()
+
+
+def conditional_response(body, etag, mimetype):
+    """Build a response with a strong ETag, answering 304 when the client's copy matches."""
+    response = app.response_class(body, mimetype=mimetype)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+
+@contextmanager
+def timed_fetch(upstream):
+    """Record how long an outbound request takes, and whether it failed."""
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield
+        outcome = 'ok'
+    finally:
+        metrics.UPSTREAM_SECONDS.observe(time.perf_counter() - started, upstream=upstream, outcome=outcome)
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    """Time every request by route template, and log a sample of the slow ones."""
+    started = g.pop('request_started', None)
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.REQUEST_SECONDS.observe(elapsed, method=request.method, route=route,
+                                    status=response.status_code)
+    if SLOW_REQUEST_MS and elapsed * 1000 >= SLOW_REQUEST_MS:
+        metrics.SLOW_REQUESTS.inc(route=route)
+        if random.random() < SLOW_REQUEST_SAMPLE:
+            print(f"Slow request: {request.method} {request.full_path.rstrip('?')} "
+                  f"{response.status_code} {elapsed * 1000:.0f}ms")
+    return response
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus metrics, merged across every worker process."""
+    return Response(metrics.render(metrics_publisher.snapshots()), mimetype='text/plain; version=0.0.4')
+
 @app.route('/')
 def index():
     """Home page - redirects to display list."""
@@ -192,14 +1663,10 @@ def login():
         if not username or not password:
             return jsonify({'success': False, 'message': 'Username and password required'}), 400
         
-        conn = sqlite3.connect(DATABASE_FILE)
-        cursor = conn.cursor()
-        cursor.execute('SELECT id, password_hash FROM users WHERE username = ?', (username,))
-        user = cursor.fetchone()
-        conn.close()
+        user = db.fetchone('SELECT id, password_hash FROM users WHERE username = ?', (username,))
         
-        if user and user[1] == hash_password(password):
-            session['user_id'] = user[0]
+        if user and user['password_hash'] == hash_password(password):
+            session['user_id'] = user['id']
             session['username'] = username
             return jsonify({'success': True, 'message': 'Login successful'})
         else:
@@ -207,12 +1674,8 @@ def login():
     
     # Check if default admin/admin123 is still in use
     show_default_hint = False
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    cursor.execute('SELECT password_hash FROM users WHERE username = ?', ('admin',))
-    row = cursor.fetchone()
-    conn.close()
-    if row and row[0] == hashlib.sha256(b'admin123').hexdigest():
+    row = db.fetchone('SELECT password_hash FROM users WHERE username = ?', ('admin',))
+    if row and row['password_hash'] == hashlib.sha256(b'admin123').hexdigest():
         show_default_hint = True
 
     return render_template('login.html', show_default_hint=show_default_hint)
@@ -232,24 +1695,21 @@ def admin():
 @app.route('/displays')
 @require_auth
 def displays():
-    """Display management page."""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    cursor.execute('SELECT id, name, description, created_at FROM displays ORDER BY created_at DESC')
-    displays_list = cursor.fetchall()
-    conn.close()
-    
-    return render_template('displays.html', displays=displays_list)
+    """Display management page, one page of the fleet at a time."""
+    try:
+        displays_list, next_cursor = fleet_page('id, name, description, created_at', request.args)
+    except ValueError as e:
+        return str(e), 400
+
+    filters = {key: request.args[key] for key in ('q', 'status', 'tag', 'limit') if request.args.get(key)}
+    return render_template('displays.html', displays=displays_list, next_cursor=next_cursor,
+                           filters=filters, paged='cursor' in request.args)
 
 @app.route('/display/<int:display_id>')
 @require_auth
 def display_config(display_id):
     """Display configuration page."""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM displays WHERE id = ?', (display_id,))
-    display = cursor.fetchone()
-    conn.close()
+    display = db.fetchone('SELECT * FROM displays WHERE id = ?', (display_id,))
     
     if not display:
         return redirect(url_for('displays'))
@@ -259,89 +1719,357 @@ def display_config(display_id):
 @app.route('/player/<int:display_id>')
 def player(display_id):
     """Fullscreen player page (no auth required for viewing)."""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM displays WHERE id = ?', (display_id,))
-    display = cursor.fetchone()
-    conn.close()
-    
-    if not display:
-        return "Display not found", 404
-    
-    # Parse the JSON configuration
     try:
-        layout_config = json.loads(display[3])
-        background_config = json.loads(display[4])
+        entry = config_cache.get(display_id)
     except json.JSONDecodeError as e:
         return f"Invalid display configuration: {e}", 500
-    
-    # Pass parsed configuration to template
-    display_data = {
-        'id': display[0],
-        'name': display[1],
-        'description': display[2],
-        'layout_config': layout_config,
-        'background_config': background_config
-    }
-    
-    return render_template('player.html', display=display, display_data=display_data)
 
-@app.route('/api/display/<int:display_id>', methods=['GET', 'PUT', 'DELETE'])
+    if not entry:
+        return "Display not found", 404
+
+    body, etag = config_cache.payload(entry, 'player', lambda e: render_template(
+        'player.html', display=e['display'], display_data=e['display_data'],
+        timeline={'version': e['version'], 'zones': config_cache.timeline(e)}))
+    return conditional_response(body, etag, 'text/html')
+
+@app.route('/api/display/<int:display_id>', methods=['GET', 'PUT', 'PATCH', 'DELETE'])
 @require_auth
 def api_display(display_id):
     """API endpoint for display data."""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    
     if request.method == 'GET':
-        cursor.execute('SELECT * FROM displays WHERE id = ?', (display_id,))
-        display = cursor.fetchone()
-        conn.close()
+        entry = config_cache.get(display_id)
         
-        if not display:
+        if not entry:
             return jsonify({'error': 'Display not found'}), 404
         
-        return jsonify({
-            'id': display[0],
-            'name': display[1],
-            'description': display[2],
-            'layout_config': json.loads(display[3]),
-            'background_config': json.loads(display[4])
-        })
+        body, etag = config_cache.payload(entry, 'json', lambda e: json.dumps(e['display_data']))
+        return conditional_response(body, etag, 'application/json')
     
     elif request.method == 'PUT':
         data = request.json
-        layout_config = json.dumps(data.get('layout_config', {}))
-        background_config = json.dumps(data.get('background_config', {}))
+        replacement = {
+            'name': data.get('name'),
+            'description': data.get('description'),
+            'layout_config': data.get('layout_config', {}),
+            'background_config': data.get('background_config', {})
+        }
+        with db.transaction() as conn:
+            saved = save_display_config(conn, display_id, lambda current: replacement)
+        if saved is None:
+            return jsonify({'error': 'Display not found'}), 404
+        if saved[1]:
+            config_changed(display_id)
 
-        cursor.execute('''
-            UPDATE displays
-            SET name = ?, description = ?, layout_config = ?, background_config = ?,
-                updated_at = CURRENT_TIMESTAMP, config_version = COALESCE(config_version, 0) + 1
-            WHERE id = ?
-        ''', (data.get('name'), data.get('description'), layout_config, background_config, display_id))
+        return jsonify({'success': True, 'config_version': saved[0]})
 
-        conn.commit()
-        conn.close()
+    elif request.method == 'PATCH':
+        # JSON merge patch of the editable fields; lists are patched by index
+        patch = request.get_json(force=True, silent=True)
+        if not isinstance(patch, dict) or not patch or set(patch) - set(CONFIG_FIELDS):
+            return jsonify({'error': f'Body must be an object with any of: {", ".join(CONFIG_FIELDS)}'}), 400
+        try:
+            check_config_patch(patch)
+            with db.transaction() as conn:
+                saved = save_display_config(conn, display_id, lambda current: merge_patch(current, patch))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if saved is None:
+            return jsonify({'error': 'Display not found'}), 404
+        if saved[1]:
+            config_changed(display_id)
 
-        return jsonify({'success': True})
+        return jsonify({'success': True, 'config_version': saved[0], 'changes': len(saved[1])})
     
     elif request.method == 'DELETE':
-        # Check if display exists
-        cursor.execute('SELECT id FROM displays WHERE id = ?', (display_id,))
-        display = cursor.fetchone()
-        
-        if not display:
-            conn.close()
+        # Delete the display (and its history), if it exists
+        if db.execute('DELETE FROM displays WHERE id = ?', (display_id,)).rowcount == 0:
             return jsonify({'success': False, 'message': 'Display not found'}), 404
-        
-        # Delete the display
-        cursor.execute('DELETE FROM displays WHERE id = ?', (display_id,))
-        conn.commit()
-        conn.close()
+        heartbeats.forget(display_id)
+        config_cache.invalidate(display_id)
+        config_events.publish(display_id)
         
         return jsonify({'success': True, 'message': 'Display deleted successfully'})
 
+@app.route('/api/display/<int:display_id>/config')
+def api_display_config(display_id):
+    """Current display config for players (same data the player page embeds)."""
+    try:
+        entry = config_cache.get(display_id)
+    except json.JSONDecodeError as e:
+        return jsonify({'error': f'Invalid display configuration: {e}'}), 500
+
+    if not entry:
+        return jsonify({'error': 'Display not found'}), 404
+
+    body, etag = config_cache.payload(entry, 'json', lambda e: json.dumps(e['display_data']))
+    return conditional_response(body, etag, 'application/json')
+
+@app.route('/api/display/<int:display_id>/config/delta')
+def api_display_config_delta(display_id):
+    """Changes between two config versions (?from=A, optional &to=B) for players.
+
+    Answers 410 when the history no longer reaches back to `from`; the
+    player then fetches the full config instead.
+    """
+    try:
+        entry = config_cache.get(display_id)
+    except json.JSONDecodeError as e:
+        return jsonify({'error': f'Invalid display configuration: {e}'}), 500
+    if not entry:
+        return jsonify({'error': 'Display not found'}), 404
+
+    from_version = request.args.get('from', type=int)
+    to_version = request.args.get('to', entry['version'], type=int)
+    if from_version is None:
+        return jsonify({'error': 'from parameter required'}), 400
+
+    changes = config_deltas(display_id, from_version, to_version)
+    if changes is None:
+        return jsonify({'error': 'History not available for these versions; fetch the full config'}), 410
+    return jsonify({'from': from_version, 'to': to_version, 'changes': changes})
+
+def schedule_payload(entry):
+    """Compiled timeline as players fetch it (zone indexes become string keys)."""
+    return json.dumps({'version': entry['version'], 'zones': config_cache.timeline(entry)})
+
+def schedule_moment(args):
+    """The ?at= wall-clock time (ISO 8601, display-local), or the server's local time now."""
+    at = args.get('at')
+    if not at:
+        return datetime.now().replace(second=0, microsecond=0)
+    try:
+        return datetime.fromisoformat(at)
+    except ValueError:
+        raise ValueError('at must be an ISO 8601 date and time, e.g. 2024-05-06T14:30')
+
+@app.route('/api/display/<int:display_id>/schedule')
+def api_display_schedule(display_id):
+    """The display's schedule compiled to weekly transitions, for players."""
+    try:
+        entry = config_cache.get(display_id)
+    except json.JSONDecodeError as e:
+        return jsonify({'error': f'Invalid display configuration: {e}'}), 500
+    if not entry:
+        return jsonify({'error': 'Display not found'}), 404
+
+    body, etag = config_cache.payload(entry, 'schedule', schedule_payload)
+    return conditional_response(body, etag, 'application/json')
+
+@app.route('/api/display/<int:display_id>/playing')
+@require_auth
+def api_display_playing(display_id):
+    """What each zone of a display shows at ?at= (default now)."""
+    try:
+        moment = schedule_moment(request.args)
+        entry = config_cache.get(display_id)
+    except (ValueError, json.JSONDecodeError) as e:
+        return jsonify({'error': str(e)}), 400
+    if not entry:
+        return jsonify({'error': 'Display not found'}), 404
+
+    return jsonify({'id': display_id, 'at': moment.isoformat(), 'zones': playing_at(entry, moment)})
+
+@app.route('/api/display/<int:display_id>/events')
+def api_display_events(display_id):
+    """Server-sent event stream pushing config changes to a player."""
+    if config_cache.get(display_id) is None:
+        return jsonify({'error': 'Display not found'}), 404
+    heartbeats.start()  # its version sync wakes this stream for saves made by other workers
+
+    # EventSource resends the last event id on reconnect
+    known = request.headers.get('Last-Event-ID', request.args.get('version'))
+    try:
+        known = int(known) if known is not None else None
+    except ValueError:
+        known = None
+
+    def stream():
+        nonlocal known
+        generation = config_events.generation(display_id)
+        yield f'retry: {EVENTS_RETRY_MS}\n\n'
+        while True:
+            entry = config_cache.get(display_id)
+            if entry is None:
+                yield 'event: deleted\ndata: {}\n\n'
+                return
+            if entry['version'] != known:
+                # Players that are only a few versions behind get just the changes
+                changes = config_deltas(display_id, known, entry['version']) if known else None
+                if changes is not None:
+                    delta = json.dumps({'from': known, 'to': entry['version'], 'changes': changes})
+                    yield f'id: {entry["version"]}\nevent: delta\ndata: {delta}\n\n'
+                else:
+                    data, _ = config_cache.payload(entry, 'json', lambda e: json.dumps(e['display_data']))
+                    yield f'id: {entry["version"]}\nevent: config\ndata: {data.decode()}\n\n'
+                known = entry['version']
+            new_generation = config_events.wait(display_id, generation, EVENTS_KEEPALIVE)
+            if new_generation == generation:
+                yield ': keepalive\n\n'
+            generation = new_generation
+
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/api/display/<int:display_id>/tags', methods=['GET', 'PUT'])
+@require_auth
+def api_display_tags(display_id):
+    """Get or replace a display's tags."""
+    if not db.fetchone('SELECT 1 FROM displays WHERE id = ?', (display_id,)):
+        return jsonify({'error': 'Display not found'}), 404
+
+    if request.method == 'PUT':
+        tags = (request.get_json(silent=True) or {}).get('tags')
+        if not isinstance(tags, list) or not all(isinstance(t, str) for t in tags):
+            return jsonify({'error': 'tags must be a list of strings'}), 400
+        tags = sorted({t.strip().lower() for t in tags if t.strip()})
+        if any(len(t) > TAG_MAX_LENGTH for t in tags):
+            return jsonify({'error': f'tags are limited to {TAG_MAX_LENGTH} characters'}), 400
+        with db.transaction() as conn:
+            conn.execute('DELETE FROM display_tags WHERE display_id = ?', (display_id,))
+            conn.executemany('INSERT INTO display_tags (tag, display_id) VALUES (?, ?)',
+                             [(tag, display_id) for tag in tags])
+
+    rows = db.fetchall('SELECT tag FROM display_tags WHERE display_id = ? ORDER BY tag', (display_id,))
+    return jsonify({'tags': [row['tag'] for row in rows]})
+
+@app.route('/api/displays/bulk', methods=['POST'])
+@require_auth
+def api_displays_bulk():
+    """Apply one change to every selected display in a single transaction.
+
+    Body: {"select": {...}, one of "patch" / "zones" / "template", "dry_run",
+    "atomic"}. See select_displays() and bulk_update() for the accepted forms.
+    With "atomic" (the default) a failure on any display rolls back the whole
+    batch; "atomic": false commits the displays that succeeded.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'JSON body required'}), 400
+    try:
+        update = bulk_update(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    atomic = data.get('atomic', True)
+    if not isinstance(atomic, bool):
+        return jsonify({'error': 'atomic must be true or false'}), 400
+
+    results = []
+    try:
+        with db.transaction() as conn:
+            display_ids = select_displays(conn, data.get('select') or {})
+            for display_id in display_ids:
+                result = {'id': display_id}
+                try:
+                    version, delta = save_display_config(conn, display_id, update)
+                except ValueError as e:
+                    result.update(status='error', error=str(e))
+                else:
+                    result.update(status='updated' if delta else 'unchanged',
+                                  config_version=version, changes=len(delta))
+                results.append(result)
+            errors = sum(1 for r in results if r['status'] == 'error')
+            rolled_back = atomic and errors > 0
+            if rolled_back:
+                for result in results:
+                    if result['status'] == 'updated':
+                        result['status'] = 'rolled_back'
+            if rolled_back or data.get('dry_run'):
+                conn.rollback()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    updated = [r['id'] for r in results if r['status'] == 'updated']
+    if not data.get('dry_run'):
+        for display_id in updated:
+            config_changed(display_id)
+
+    body = {
+        'success': not rolled_back,
+        'dry_run': bool(data.get('dry_run')),
+        'matched': len(results),
+        'updated': len(updated),
+        'errors': errors,
+        'results': results
+    }
+    if rolled_back:
+        body['error'] = f'{errors} of {len(results)} displays failed; no display was changed'
+        return jsonify(body), 400
+    return jsonify(body)
+
+
+def select_displays(conn, selector):
+    """Return the ids of displays matching a bulk selector, in id order.
+
+    {"ids": [1, 2]}, {"name": "Lobby*"} (a GLOB pattern), {"tag": "lobby"}
+    or {"all": true}; several keys must all match. Raises ValueError.
+    """
+    if not isinstance(selector, dict):
+        raise ValueError('select must be an object')
+    where, params = [], []
+    if 'ids' in selector:
+        ids = selector['ids']
+        if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+            raise ValueError('select.ids must be a list of display ids')
+        where.append('id IN (SELECT value FROM json_each(?))')
+        params.append(json.dumps(ids))
+    if 'name' in selector:
+        where.append('name GLOB ?')
+        params.append(str(selector['name']))
+    if 'tag' in selector:
+        where.append('id IN (SELECT display_id FROM display_tags WHERE tag = ?)')
+        params.append(str(selector['tag']).strip().lower())
+    if not where and selector.get('all') is not True:
+        raise ValueError('select needs ids, name or tag (or "all": true for the whole fleet)')
+
+    sql = 'SELECT id FROM displays'
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    return [row['id'] for row in conn.execute(sql + ' ORDER BY id', params)]
+
+
+def bulk_update(data):
+    """Build the update function for a bulk request. Raises ValueError.
+
+    - "patch": a merge patch, as for PATCH /api/display/<id>
+    - "zones": {"match": {"type": "rss"}, "set": {"content": "..."}} merges
+      "set" into every zone whose fields equal "match" (all zones if omitted)
+    - "template": a display id whose layout and background are copied
+    """
+    kinds = [key for key in ('patch', 'zones', 'template') if key in data]
+    if len(kinds) != 1:
+        raise ValueError('Provide exactly one of patch, zones or template')
+
+    if 'patch' in data:
+        patch = data['patch']
+        if not isinstance(patch, dict) or set(patch) - set(CONFIG_FIELDS):
+            raise ValueError(f'patch must be an object with any of: {", ".join(CONFIG_FIELDS)}')
+        check_config_patch(patch)
+        return lambda current: merge_patch(current, patch)
+
+    if 'zones' in data:
+        mutation = data['zones']
+        if not isinstance(mutation, dict) or not isinstance(mutation.get('set'), dict):
+            raise ValueError('zones needs a "set" object')
+        match = mutation.get('match') or {}
+
+        def update(current):
+            layout = current['layout_config']
+            zones = [merge_patch(zone, mutation['set'])
+                     if all(zone.get(k) == v for k, v in match.items()) else zone
+                     for zone in layout.get('zones', [])]
+            return dict(current, layout_config=dict(layout, zones=zones))
+        return update
+
+    template = db.fetchone('SELECT layout_config, background_config FROM displays WHERE id = ?',
+                           (data['template'],))
+    if not template:
+        raise ValueError('template display not found')
+    layout, background = json.loads(template['layout_config']), json.loads(template['background_config'])
+    return lambda current: dict(current, layout_config=layout, background_config=background)
+
 @app.route('/api/display', methods=['POST'])
 @require_auth
 def api_create_display():
@@ -401,43 +2129,33 @@ def api_create_display():
         'value': 'linear-gradient(135deg, #0f0c29 0%, #302b63 50%, #24243e 100%)'
     })
 
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    cursor.execute('''
+    display_id = db.execute('''
         INSERT INTO displays (name, description, layout_config, background_config) 
         VALUES (?, ?, ?, ?)
-    ''', (name, description, default_layout, default_background))
-    
-    display_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
+    ''', (name, description, default_layout, default_background)).lastrowid
     
     return jsonify({'success': True, 'display_id': display_id})
 
 @app.route('/api/rss')
 def api_rss():
-    """Fetch RSS feed content."""
+    """Fetch RSS feed content as plain-text items.
+
+    Optional parameters: count (items), desc (description length, 0 for
+    none) and titles=1 for titles only, as the ticker needs.
+    """
     url = request.args.get('url')
     if not url:
         return jsonify({'error': 'URL required'}), 400
-    
+
+    count = min(max(request.args.get('count', RSS_DEFAULT_ITEMS, type=int), 1), RSS_MAX_ITEMS)
+    desc = min(max(request.args.get('desc', RSS_DEFAULT_DESCRIPTION, type=int), 0), RSS_DESCRIPTION_MAX)
+    titles_only = request.args.get('titles') in ('1', 'true')
+
     try:
-        feed = feedparser.parse(url)
-        items = []
-        for entry in feed.entries[:10]:  # Limit to 10 items
-            items.append({
-                'title': entry.get('title', ''),
-                'description': entry.get('description', ''),
-                'link': entry.get('link', ''),
-                'published': entry.get('published', '')
-            })
-        
-        return jsonify({
-            'title': feed.feed.get('title', ''),
-            'items': items
-        })
+        body, etag = feed_cache.view(url, count, desc, titles_only)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+    return conditional_response(body, etag, 'application/json')
 
 @app.route('/api/upload', methods=['POST'])
 @require_auth
@@ -451,18 +2169,161 @@ def api_upload():
         return jsonify({'error': 'No file selected'}), 400
     
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        # Add timestamp to prevent conflicts
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_')
-        filename = timestamp + filename
-        
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(filepath)
-        
-        return jsonify({'success': True, 'filename': filename, 'url': f'/static/uploads/{filename}'})
+        media_id, filename = store_upload(file.stream, file.filename.rsplit('.', 1)[1].lower())
+        return jsonify({'success': True, 'filename': filename, 'url': f'/static/uploads/{filename}',
+                        'media_id': media_id})
     
     return jsonify({'error': 'Invalid file type'}), 400
 
+
+@app.route('/api/uploads', methods=['POST'])
+@require_auth
+def api_uploads():
+    """Start a resumable upload of {filename, size}; chunks then go to PATCH /api/uploads/<id>."""
+    data = request.get_json(force=True, silent=True) or {}
+    filename = data.get('filename') or ''
+    size = data.get('size')
+    if not allowed_file(filename):
+        return jsonify({'error': 'Invalid file type'}), 400
+    if not isinstance(size, int) or not 0 < size <= UPLOAD_MAX_SIZE:
+        return jsonify({'error': f'size must be between 1 and {UPLOAD_MAX_SIZE} bytes'}), 400
+
+    upload_id = secrets.token_hex(16)
+    open(upload_path(upload_id), 'wb').close()
+    db.execute('INSERT INTO uploads (id, extension, size) VALUES (?, ?, ?)',
+               (upload_id, filename.rsplit('.', 1)[1].lower(), size))
+    return jsonify({'id': upload_id, 'offset': 0, 'size': size, 'chunk_size': UPLOAD_CHUNK_SIZE}), 201
+
+
+@app.route('/api/uploads/<upload_id>', methods=['GET', 'PATCH', 'DELETE'])
+@require_auth
+def api_upload_chunk(upload_id):
+    """Resume, append to, or cancel a resumable upload.
+
+    PATCH appends the raw request body at the Upload-Offset header, which must
+    equal the bytes received so far (GET reports it after a dropped
+    connection). Whatever arrived before a disconnect is kept. The chunk that
+    completes the file moves it into the content store and returns the same
+    result as /api/upload.
+    """
+    row = db.fetchone('SELECT * FROM uploads WHERE id = ?', (upload_id,))
+    if not row:
+        return jsonify({'error': 'Upload not found'}), 404
+    path = upload_path(upload_id)
+
+    if request.method == 'GET':
+        return jsonify({'id': upload_id, 'offset': row['received'], 'size': row['size']})
+
+    if request.method == 'DELETE':
+        db.execute('DELETE FROM uploads WHERE id = ?', (upload_id,))
+        if os.path.exists(path):
+            os.remove(path)
+        return jsonify({'success': True})
+
+    offset = request.headers.get('Upload-Offset', type=int)
+    if offset != row['received']:
+        return jsonify({'error': 'Upload-Offset does not match the bytes received',
+                        'offset': row['received']}), 409
+    length = request.content_length
+    if length is None:
+        return jsonify({'error': 'Content-Length required'}), 411
+    if length > row['size'] - offset:
+        return jsonify({'error': 'Chunk runs past the declared size', 'offset': offset}), 400
+
+    # Stream the body into a part file of this request's own, so a racing
+    # request for the same offset can't overwrite it; a dropped connection
+    # still keeps what arrived
+    part_path = f'{path}.{secrets.token_hex(8)}'
+    written = 0
+    try:
+        with open(part_path, 'wb') as part:
+            while written < length:
+                try:
+                    chunk = request.stream.read(min(64 * 1024, length - written))
+                except OSError:
+                    break
+                if not chunk:
+                    break
+                part.write(chunk)
+                written += len(chunk)
+
+        # Claim the offset and append under the write lock, so only one
+        # request per offset lands and appends happen in order
+        received = offset + written
+        with db.transaction() as conn:
+            updated = conn.execute('''
+                UPDATE uploads SET received = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND received = ?
+            ''', (received, upload_id, offset)).rowcount
+            if updated:
+                with open(part_path, 'rb') as part, open(path, 'r+b') as f:
+                    f.seek(offset)
+                    shutil.copyfileobj(part, f)
+                    f.truncate()
+    finally:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+    if not updated:
+        current = db.fetchone('SELECT received FROM uploads WHERE id = ?', (upload_id,))
+        return jsonify({'error': 'Another request wrote to this upload',
+                        'offset': current['received'] if current else None}), 409
+
+    if received < row['size']:
+        response = jsonify({'offset': received, 'size': row['size']})
+        response.headers['Upload-Offset'] = str(received)
+        return response
+
+    db.execute('DELETE FROM uploads WHERE id = ?', (upload_id,))
+    media_id, filename = commit_upload(path, run_off_loop(file_digest, path), row['extension'])
+    return jsonify({'success': True, 'filename': filename, 'url': f'/static/uploads/{filename}',
+                    'media_id': media_id, 'offset': received, 'size': row['size']})
+
+
+@app.route('/media/<path:filename>')
+def media(filename):
+    """Serve an uploaded file, picking the smallest image variant that covers ?w= x ?h= pixels.
+
+    Range requests are answered with 206 partial content, so players can
+    start and seek videos without downloading them first.
+    """
+    width = request.args.get('w', 0, type=int)
+    height = request.args.get('h', 0, type=int)
+
+    row = db.fetchone('SELECT id, status FROM media WHERE filename = ?', (filename,))
+    served = filename
+    if row and (width or height):
+        variant = db.fetchone('''
+            SELECT filename FROM media_variants
+            WHERE media_id = ? AND width >= ? AND height >= ?
+            ORDER BY width LIMIT 1
+        ''', (row['id'], width, height))
+        if variant:
+            served = variant['filename']
+
+    # Until processing finishes a better variant may still appear, so cache briefly
+    max_age = 31536000 if row and row['status'] != 'pending' else 60
+    response = send_from_directory(os.path.abspath(UPLOAD_FOLDER), served, max_age=max_age)
+    if max_age > 60 and MEDIA_HASHED_NAME.match(filename):
+        # Content-addressed: the bytes behind this URL can never change
+        response.headers['Cache-Control'] = f'public, max-age={max_age}, immutable'
+    return response
+
+@app.route('/static/dist/<path:filename>')
+def dist_asset(filename):
+    """Serve a fingerprinted asset, using its precompressed copy when the client accepts it."""
+    dist_dir = os.path.join(app.static_folder, 'dist')
+    mimetype = mimetypes.guess_type(filename)[0]
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if encoding in request.accept_encodings and os.path.isfile(os.path.join(dist_dir, filename + suffix)):
+            response = send_from_directory(dist_dir, filename + suffix, mimetype=mimetype, max_age=ASSET_MAX_AGE)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(dist_dir, filename, max_age=ASSET_MAX_AGE)
+    response.headers['Cache-Control'] = f'public, max-age={ASSET_MAX_AGE}, immutable'
+    response.vary.add('Accept-Encoding')
+    return response
+
 @app.route('/api/time')
 def api_time():
     """Get current time."""
@@ -475,48 +2336,229 @@ def api_time():
 
 @app.route('/api/display/<int:display_id>/heartbeat', methods=['POST'])
 def api_heartbeat(display_id):
-    """Player heartbeat - updates last_seen, returns config_version."""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    cursor.execute('UPDATE displays SET last_seen = CURRENT_TIMESTAMP WHERE id = ?', (display_id,))
-    conn.commit()
-    cursor.execute('SELECT config_version FROM displays WHERE id = ?', (display_id,))
-    row = cursor.fetchone()
-    conn.close()
+    """Player heartbeat - records last_seen and any telemetry in memory, returns config_version."""
+    data = request.get_json(force=True, silent=True)
+    telemetry = telemetry_sample(data.get('telemetry')) if isinstance(data, dict) else None
+    version = heartbeats.beat(display_id, telemetry)
+    if version is None:
+        return jsonify({'error': 'Display not found'}), 404
 
-    if not row:
+    return jsonify({'config_version': version})
+
+@app.route('/api/display/<int:display_id>/telemetry')
+@require_auth
+def api_display_telemetry(display_id):
+    """A display's telemetry over the last ?window= seconds, oldest first."""
+    try:
+        window, resolution = telemetry_window(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if heartbeats.config_version(display_id) is None:
         return jsonify({'error': 'Display not found'}), 404
 
-    return jsonify({'config_version': row[0] or 1})
+    rows = db.fetchall('''
+        SELECT * FROM telemetry
+        WHERE display_id = ? AND resolution = ? AND bucket >= ?
+        ORDER BY bucket
+    ''', (display_id, resolution, int(time.time()) - window))
+    return jsonify({
+        'id': display_id,
+        'window': window,
+        'resolution': resolution,
+        'series': [dict({'time': datetime.fromtimestamp(row['bucket'], timezone.utc).isoformat(),
+                         'samples': row['samples']},
+                        **{field: row[field] for field in TELEMETRY_FIELDS}) for row in rows]
+    })
 
 
 @app.route('/api/displays/status')
 @require_auth
 def api_displays_status():
-    """Get online/offline status for all displays."""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    cursor.execute('SELECT id, name, last_seen FROM displays')
-    displays_list = cursor.fetchall()
-    conn.close()
-
-    result = []
-    for d in displays_list:
-        is_online = False
-        if d[2]:
-            try:
-                last_seen = datetime.strptime(d[2], '%Y-%m-%d %H:%M:%S')
-                is_online = (datetime.now() - last_seen).total_seconds() < 90
-            except (ValueError, TypeError):
-                pass
-        result.append({
-            'id': d[0],
-            'name': d[1],
-            'last_seen': d[2],
-            'is_online': is_online
-        })
+    """Get online/offline status for one page of displays.
+
+    Query parameters: status (online/offline), q (name prefix), tag, cursor
+    (the next_cursor of the previous page), limit and threshold (seconds).
+    """
+    try:
+        rows, next_cursor = fleet_page('id, name, last_seen', request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({
+        'displays': [{
+            'id': d['id'],
+            'name': d['name'],
+            'last_seen': heartbeats.last_seen(d['id'], d['last_seen']),
+            'is_online': bool(d['is_online'])
+        } for d in rows],
+        'next_cursor': next_cursor
+    })
+
+@app.route('/api/displays/playing')
+@require_auth
+def api_displays_playing():
+    """What every zone shows at ?at= (default now), for one page of displays.
+
+    Takes the same filters and cursor as /api/displays/status.
+    """
+    try:
+        moment = schedule_moment(request.args)
+        rows, next_cursor = fleet_page('id, name', request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    displays = []
+    for row in rows:
+        try:
+            entry = config_cache.get(row['id'])
+        except json.JSONDecodeError:
+            entry = None
+        if entry:
+            displays.append({'id': row['id'], 'name': row['name'], 'zones': playing_at(entry, moment)})
+    return jsonify({'at': moment.isoformat(), 'displays': displays, 'next_cursor': next_cursor})
+
+def telemetry_window(args):
+    """Return (seconds, resolution) for ?window=, using the finest ring buffer that covers it."""
+    window = args.get('window', 3600, type=int)
+    for resolution, slots in TELEMETRY_RESOLUTIONS:
+        if 0 < window <= resolution * slots:
+            return window, resolution
+    longest = TELEMETRY_RESOLUTIONS[-1][0] * TELEMETRY_RESOLUTIONS[-1][1]
+    raise ValueError(f'window must be between 1 and {longest} seconds')
+
+@app.route('/api/displays/slowest')
+@require_auth
+def api_displays_slowest():
+    """Displays ranked worst first by one telemetry field over the last ?window= seconds.
+
+    Query parameters: metric (default fps), window (default 3600) and limit.
+    """
+    metric = request.args.get('metric', 'fps')
+    if metric not in TELEMETRY_FIELDS:
+        return jsonify({'error': f'metric must be one of: {", ".join(TELEMETRY_FIELDS)}'}), 400
+    try:
+        window, resolution = telemetry_window(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    limit = min(max(request.args.get('limit', 20, type=int), 1), FLEET_PAGE_MAX)
+
+    combine = TELEMETRY_FIELDS[metric][2]
+    summary = ', '.join(f'{c}(t.{field}) AS {field}' for field, (_, _, c) in TELEMETRY_FIELDS.items())
+    order = 'ASC' if metric == 'fps' else 'DESC'  # a low frame rate is the bad end
+    rows = db.fetchall(f'''
+        SELECT t.display_id, d.name, {combine}(t.{metric}) AS value, SUM(t.samples) AS samples, {summary}
+        FROM telemetry t JOIN displays d ON d.id = t.display_id
+        WHERE t.resolution = ? AND t.bucket >= ?
+        GROUP BY t.display_id
+        HAVING value IS NOT NULL
+        ORDER BY value {order}
+        LIMIT ?
+    ''', (resolution, int(time.time()) - window, limit))
+
+    return jsonify({
+        'metric': metric,
+        'window': window,
+        'resolution': resolution,
+        'displays': [{
+            'id': row['display_id'],
+            'name': row['name'],
+            'value': row['value'],
+            'samples': row['samples'],
+            'telemetry': {field: row[field] for field in TELEMETRY_FIELDS}
+        } for row in rows]
+    })
+
+
+@app.route('/api/displays/counts')
+@require_auth
+def api_displays_counts():
+    """Aggregate online/offline counts for the whole fleet."""
+    try:
+        threshold = online_threshold(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    online, _, params = online_condition(threshold)
+    row = db.fetchone(f'''
+        SELECT (SELECT COUNT(*) FROM displays) AS total,
+               (SELECT COUNT(*) FROM displays WHERE {online}) AS online
+    ''', params)
+    return jsonify({
+        'total': row['total'],
+        'online': row['online'],
+        'offline': row['total'] - row['online'],
+        'threshold': threshold
+    })
+
+
+def online_threshold(args):
+    """Seconds since the last heartbeat before a display counts as offline."""
+    threshold = args.get('threshold', ONLINE_THRESHOLD, type=int)
+    if threshold <= 0:
+        raise ValueError('threshold must be a positive number of seconds')
+    return threshold
+
+
+def online_condition(threshold):
+    """Return (online sql, offline sql, params) for a `threshold` in seconds.
+
+    last_seen in the database trails heartbeats by up to HEARTBEAT_FLUSH_INTERVAL,
+    so displays this worker has heard from since are matched by id as well.
+    Both conditions compare last_seen with a plain cutoff, so SQLite can
+    range-search idx_displays_last_seen.
+    """
+    cutoff = datetime.fromtimestamp(time.time() - threshold, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+    recent = json.dumps(heartbeats.seen_within(threshold))
+    return ('(last_seen >= ? OR id IN (SELECT value FROM json_each(?)))',
+            '((last_seen IS NULL OR last_seen < ?) AND id NOT IN (SELECT value FROM json_each(?)))',
+            [cutoff, recent])
+
 
-    return jsonify(result)
+def fleet_page(columns, args):
+    """Return (rows, next_cursor) for one page of displays, newest first.
+
+    Pages are keyed on id rather than OFFSET, so every page costs the same no
+    matter how deep it is. Rows carry an is_online flag computed in SQL by
+    online_condition, which the status filter uses too.
+    """
+    limit = min(max(args.get('limit', FLEET_PAGE_SIZE, type=int), 1), FLEET_PAGE_MAX)
+    online, offline, online_params = online_condition(online_threshold(args))
+    where, params = [], list(online_params)
+
+    status = args.get('status')
+    if status == 'online':
+        where.append(online)
+        params.extend(online_params)
+    elif status == 'offline':
+        where.append(offline)
+        params.extend(online_params)
+    elif status:
+        raise ValueError('status must be online or offline')
+
+    prefix = args.get('q', '').strip()
+    if prefix:
+        prefix = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        where.append("name LIKE ? ESCAPE '\\'")
+        params.append(prefix + '%')
+
+    tag = args.get('tag', '').strip().lower()
+    if tag:
+        where.append('id IN (SELECT display_id FROM display_tags WHERE tag = ?)')
+        params.append(tag)
+
+    cursor = args.get('cursor', type=int)
+    if cursor:
+        where.append('id < ?')
+        params.append(cursor)
+
+    sql = f'SELECT {columns}, COALESCE({online}, 0) AS is_online FROM displays'
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    sql += ' ORDER BY id DESC LIMIT ?'
+    # Fetch one extra row to learn whether another page follows
+    rows = db.fetchall(sql, params + [limit + 1])
+    next_cursor = rows[limit - 1]['id'] if len(rows) > limit else None
+    return rows[:limit], next_cursor
 
 
 @app.route('/api/weather')
@@ -529,123 +2571,201 @@ def api_weather():
     if not lat or not lon:
         return jsonify({'error': 'lat and lon parameters required'}), 400
 
-    cache_key = f"{lat},{lon},{units}"
-    now = time.time()
-    if cache_key in _weather_cache:
-        cached = _weather_cache[cache_key]
-        if now - cached['timestamp'] < WEATHER_CACHE_TTL:
-            return jsonify(cached['data'])
-
     try:
-        temp_unit = 'fahrenheit' if units == 'F' else 'celsius'
-        wind_unit = 'mph' if units == 'F' else 'kmh'
-        params = urllib.parse.urlencode({
-            'latitude': lat,
-            'longitude': lon,
-            'current': 'temperature_2m,relative_humidity_2m,weather_code,wind_speed_10m',
-            'daily': 'weather_code,temperature_2m_max,temperature_2m_min',
-            'temperature_unit': temp_unit,
-            'wind_speed_unit': wind_unit,
-            'forecast_days': 3,
-            'timezone': 'auto'
-        })
-        url = f'https://api.open-meteo.com/v1/forecast?{params}'
-        req = urllib.request.Request(url, headers={'User-Agent': 'DigitalSignage/1.0'})
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            data = json.loads(resp.read().decode())
-
-        # Map WMO weather codes to conditions and emojis
-        def weather_info(code):
-            mapping = {
-                0: ('Clear', '☀️'), 1: ('Mostly Clear', '🌤️'), 2: ('Partly Cloudy', '⛅'),
-                3: ('Overcast', '☁️'), 45: ('Foggy', '🌫️'), 48: ('Foggy', '🌫️'),
-                51: ('Light Drizzle', '🌦️'), 53: ('Drizzle', '🌦️'), 55: ('Heavy Drizzle', '🌧️'),
-                61: ('Light Rain', '🌧️'), 63: ('Rain', '🌧️'), 65: ('Heavy Rain', '🌧️'),
-                71: ('Light Snow', '🌨️'), 73: ('Snow', '🌨️'), 75: ('Heavy Snow', '❄️'),
-                77: ('Snow Grains', '🌨️'), 80: ('Light Showers', '🌦️'), 81: ('Showers', '🌧️'),
-                82: ('Heavy Showers', '🌧️'), 85: ('Snow Showers', '🌨️'), 86: ('Heavy Snow Showers', '❄️'),
-                95: ('Thunderstorm', '⛈️'), 96: ('Thunderstorm + Hail', '⛈️'), 99: ('Thunderstorm + Hail', '⛈️')
-            }
-            return mapping.get(code, ('Unknown', '🌡️'))
-
-        current = data.get('current', {})
-        daily = data.get('daily', {})
-        code = current.get('weather_code', 0)
-        condition, emoji = weather_info(code)
-        unit_symbol = '°F' if units == 'F' else '°C'
-        wind_symbol = 'mph' if units == 'F' else 'km/h'
-
-        result = {
-            'current': {
-                'temperature': current.get('temperature_2m'),
-                'humidity': current.get('relative_humidity_2m'),
-                'wind_speed': current.get('wind_speed_10m'),
-                'weather_code': code,
-                'condition': condition,
-                'emoji': emoji,
-                'unit': unit_symbol,
-                'wind_unit': wind_symbol
-            },
-            'forecast': []
-        }
+        key = weather_key(lat, lon, units)
+    except ValueError:
+        return jsonify({'error': 'lat and lon must be numbers'}), 400
 
-        if daily.get('time'):
-            for i in range(len(daily['time'])):
-                fc_code = daily['weather_code'][i] if i < len(daily.get('weather_code', [])) else 0
-                fc_cond, fc_emoji = weather_info(fc_code)
-                result['forecast'].append({
-                    'date': daily['time'][i],
-                    'temp_max': daily['temperature_2m_max'][i] if i < len(daily.get('temperature_2m_max', [])) else None,
-                    'temp_min': daily['temperature_2m_min'][i] if i < len(daily.get('temperature_2m_min', [])) else None,
-                    'condition': fc_cond,
-                    'emoji': fc_emoji
-                })
-
-        _weather_cache[cache_key] = {'data': result, 'timestamp': now}
-        return jsonify(result)
+    cached = weather_cache.get(key)
+    if cached is not None:
+        return jsonify(cached)
 
+    try:
+        return jsonify(refresh_weather([key])[key])
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+# WMO weather codes -> (condition, emoji)
+WEATHER_CODES = {
+    0: ('Clear', '☀️'), 1: ('Mostly Clear', '🌤️'), 2: ('Partly Cloudy', '⛅'),
+    3: ('Overcast', '☁️'), 45: ('Foggy', '🌫️'), 48: ('Foggy', '🌫️'),
+    51: ('Light Drizzle', '🌦️'), 53: ('Drizzle', '🌦️'), 55: ('Heavy Drizzle', '🌧️'),
+    61: ('Light Rain', '🌧️'), 63: ('Rain', '🌧️'), 65: ('Heavy Rain', '🌧️'),
+    71: ('Light Snow', '🌨️'), 73: ('Snow', '🌨️'), 75: ('Heavy Snow', '❄️'),
+    77: ('Snow Grains', '🌨️'), 80: ('Light Showers', '🌦️'), 81: ('Showers', '🌧️'),
+    82: ('Heavy Showers', '🌧️'), 85: ('Snow Showers', '🌨️'), 86: ('Heavy Snow Showers', '❄️'),
+    95: ('Thunderstorm', '⛈️'), 96: ('Thunderstorm + Hail', '⛈️'), 99: ('Thunderstorm + Hail', '⛈️')
+}
+
+
+def weather_info(code):
+    """Map a WMO weather code to a (condition, emoji) pair."""
+    return WEATHER_CODES.get(code, ('Unknown', '🌡️'))
+
+
+def weather_key(lat, lon, units):
+    """Normalise a location to the cache grid: (lat, lon, 'C' or 'F').
+
+    Raises ValueError if the coordinates aren't numeric.
+    """
+    return (round(float(lat), WEATHER_GRID_DECIMALS),
+            round(float(lon), WEATHER_GRID_DECIMALS),
+            'F' if units == 'F' else 'C')
+
+
+def refresh_weather(keys):
+    """Fetch weather for many weather_key() locations and store the shaped results.
+
+    Locations sharing units are requested together, up to WEATHER_BATCH_SIZE
+    per Open-Meteo call. Returns a dict of key -> result.
+    """
+    results = {}
+    for units in ('C', 'F'):
+        group = [key for key in dict.fromkeys(keys) if key[2] == units]
+        for i in range(0, len(group), WEATHER_BATCH_SIZE):
+            batch = group[i:i + WEATHER_BATCH_SIZE]
+            for key, data in zip(batch, _fetch_open_meteo(batch, units)):
+                results[key] = _shape_weather(data, units)
+                weather_cache.put(key, results[key])
+    return results
+
+
+def _fetch_open_meteo(batch, units):
+    """Request current weather and forecast for a list of locations in one call."""
+    temp_unit = 'fahrenheit' if units == 'F' else 'celsius'
+    wind_unit = 'mph' if units == 'F' else 'kmh'
+    params = urllib.parse.urlencode({
+        'latitude': ','.join(str(key[0]) for key in batch),
+        'longitude': ','.join(str(key[1]) for key in batch),
+        'current': 'temperature_2m,relative_humidity_2m,weather_code,wind_speed_10m',
+        'daily': 'weather_code,temperature_2m_max,temperature_2m_min',
+        'temperature_unit': temp_unit,
+        'wind_speed_unit': wind_unit,
+        'forecast_days': 3,
+        'timezone': 'auto'
+    })
+    url = f'{OPEN_METEO_URL}/v1/forecast?{params}'
+    req = urllib.request.Request(url, headers={'User-Agent': 'DigitalSignage/1.0'})
+    with timed_fetch('open_meteo'), urllib.request.urlopen(req, timeout=10) as resp:
+        data = json.loads(resp.read().decode())
+    # A single location comes back as an object, several as a list
+    return data if isinstance(data, list) else [data]
+
+
+def _shape_weather(data, units):
+    """Turn one Open-Meteo location response into the payload players render."""
+    current = data.get('current', {})
+    daily = data.get('daily', {})
+    code = current.get('weather_code', 0)
+    condition, emoji = weather_info(code)
+    unit_symbol = '°F' if units == 'F' else '°C'
+    wind_symbol = 'mph' if units == 'F' else 'km/h'
+
+    result = {
+        'current': {
+            'temperature': current.get('temperature_2m'),
+            'humidity': current.get('relative_humidity_2m'),
+            'wind_speed': current.get('wind_speed_10m'),
+            'weather_code': code,
+            'condition': condition,
+            'emoji': emoji,
+            'unit': unit_symbol,
+            'wind_unit': wind_symbol
+        },
+        'forecast': []
+    }
+
+    if daily.get('time'):
+        for i in range(len(daily['time'])):
+            fc_code = daily['weather_code'][i] if i < len(daily.get('weather_code', [])) else 0
+            fc_cond, fc_emoji = weather_info(fc_code)
+            result['forecast'].append({
+                'date': daily['time'][i],
+                'temp_max': daily['temperature_2m_max'][i] if i < len(daily.get('temperature_2m_max', [])) else None,
+                'temp_min': daily['temperature_2m_min'][i] if i < len(daily.get('temperature_2m_min', [])) else None,
+                'condition': fc_cond,
+                'emoji': fc_emoji
+            })
+
+    return result
+
+
 @app.route('/api/geocode')
 def api_geocode():
-    """Geocode a city name using Open-Meteo's geocoding API."""
+    """Geocode a city name from the cache, the local gazetteer or Open-Meteo."""
     name = request.args.get('name')
     if not name:
         return jsonify({'error': 'name parameter required'}), 400
 
-    try:
-        params = urllib.parse.urlencode({'name': name, 'count': 5, 'language': 'en', 'format': 'json'})
-        url = f'https://geocoding-api.open-meteo.com/v1/search?{params}'
-        req = urllib.request.Request(url, headers={'User-Agent': 'DigitalSignage/1.0'})
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            data = json.loads(resp.read().decode())
-
-        results = []
-        for r in data.get('results', []):
-            results.append({
-                'name': r.get('name'),
-                'country': r.get('country', ''),
-                'admin1': r.get('admin1', ''),
-                'latitude': r.get('latitude'),
-                'longitude': r.get('longitude')
-            })
+    query = ' '.join(name.lower().split())
+    cached = db.fetchone('SELECT results, fetched_at FROM geocode_cache WHERE query = ?', (query,))
+    if cached and time.time() - cached['fetched_at'] < GEOCODE_CACHE_TTL:
+        metrics.CACHE_LOOKUPS.inc(cache='geocode', result='hit')
+        return jsonify({'results': json.loads(cached['results'])})
 
+    results = geocode_local(query)
+    if results:
+        metrics.CACHE_LOOKUPS.inc(cache='geocode', result='gazetteer')
         return jsonify({'results': results})
+    metrics.CACHE_LOOKUPS.inc(cache='geocode', result='miss')
 
+    try:
+        results = geocode_online(query)
     except Exception as e:
+        if cached:
+            # Offline: an expired answer beats no answer
+            return jsonify({'results': json.loads(cached['results'])})
         return jsonify({'error': str(e)}), 500
 
+    db.execute('INSERT OR REPLACE INTO geocode_cache (query, results, fetched_at) VALUES (?, ?, ?)',
+               (query, json.dumps(results), time.time()))
+    return jsonify({'results': results})
+
+
+def geocode_local(query):
+    """Prefix-search the offline gazetteer, most populous places first."""
+    # Escape LIKE wildcards; the NOCASE index on ascii_name serves the prefix match
+    prefix = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    rows = db.fetchall('''
+        SELECT name, admin1, country, latitude, longitude FROM places
+        WHERE ascii_name LIKE ? ESCAPE '\\'
+        ORDER BY population DESC
+        LIMIT ?
+    ''', (prefix + '%', GEOCODE_RESULTS))
+    return [{
+        'name': r['name'],
+        'country': r['country'] or '',
+        'admin1': r['admin1'] or '',
+        'latitude': r['latitude'],
+        'longitude': r['longitude']
+    } for r in rows]
+
+
+def geocode_online(query):
+    """Look a place name up with Open-Meteo's geocoding API."""
+    params = urllib.parse.urlencode({'name': query, 'count': GEOCODE_RESULTS, 'language': 'en', 'format': 'json'})
+    url = f'https://geocoding-api.open-meteo.com/v1/search?{params}'
+    req = urllib.request.Request(url, headers={'User-Agent': 'DigitalSignage/1.0'})
+    with timed_fetch('geocode'), urllib.request.urlopen(req, timeout=10) as resp:
+        data = json.loads(resp.read().decode())
+
+    results = []
+    for r in data.get('results', []):
+        results.append({
+            'name': r.get('name'),
+            'country': r.get('country', ''),
+            'admin1': r.get('admin1', ''),
+            'latitude': r.get('latitude'),
+            'longitude': r.get('longitude')
+        })
+    return results
+
 
 @app.route('/debug/<int:display_id>')
 def debug_player(display_id):
     """Debug version of player to see what data is being passed."""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM displays WHERE id = ?', (display_id,))
-    display = cursor.fetchone()
-    conn.close()
+    display = db.fetchone('SELECT * FROM displays WHERE id = ?', (display_id,))
     
     if not display:
         return f"Display {display_id} not found", 404
@@ -656,27 +2776,38 @@ def debug_player(display_id):
     <head><title>Debug Display {display_id}</title></head>
     <body style="color: white; background: black; font-family: monospace; padding: 20px;">
     <h1>Debug Display {display_id}</h1>
-    <p><strong>ID:</strong> {display[0]}</p>
-    <p><strong>Name:</strong> {display[1]}</p>
-    <p><strong>Description:</strong> {display[2]}</p>
+    <p><strong>ID:</strong> {display['id']}</p>
+    <p><strong>Name:</strong> {display['name']}</p>
+    <p><strong>Description:</strong> {display['description']}</p>
     <p><strong>Layout Config (raw):</strong></p>
-    <pre>{display[3]}</pre>
+    <pre>{display['layout_config']}</pre>
     <p><strong>Background Config (raw):</strong></p>
-    <pre>{display[4]}</pre>
+    <pre>{display['background_config']}</pre>
     
     <h2>Parsed Layout:</h2>
-    <pre>{json.dumps(json.loads(display[3]), indent=2)}</pre>
+    <pre>{json.dumps(json.loads(display['layout_config']), indent=2)}</pre>
     
     <h2>Parsed Background:</h2>
-    <pre>{json.dumps(json.loads(display[4]), indent=2)}</pre>
+    <pre>{json.dumps(json.loads(display['background_config']), indent=2)}</pre>
     
     <p><a href="/player/{display_id}" style="color: cyan;">Go to actual player</a></p>
     </body>
     </html>
     """
 
+def start_background_tasks():
+    """Start the per-process background threads (heartbeat sync, prefetching, media sweeping, metrics)."""
+    heartbeats.start()
+    prefetcher.start()
+    media_sweeper.start()
+    metrics_publisher.start()
+
 if __name__ == '__main__':
+    # Development server; production runs gunicorn with gunicorn.conf.py
     init_database()
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        # Only in the reloader's serving child, not the watcher process
+        start_background_tasks()
     print("Digital Signage Server Starting...")
     print("Access at: http://localhost:5000")
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Digital Signage - Static Asset Builder
+Copies the player and admin CSS/JS into static/dist under content-hashed
+names, writes gzip and brotli precompressed copies next to each file, and
+records the mapping in static/dist/manifest.json.
+
+Templates reference assets through asset_url('js/player.js'). Once the
+manifest exists that resolves to the fingerprinted file, which can be cached
+as immutable because any change to its contents changes its name.
+
+    python3 assets.py
+"""
+
+import os
+import sys
+import gzip
+import json
+import shutil
+import hashlib
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_FILE = os.path.join(DIST_DIR, 'manifest.json')
+ASSET_DIRS = ('css', 'js')
+HASH_LENGTH = 10
+
+
+def fingerprint(path):
+    """Return the short content hash of a file."""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:HASH_LENGTH]
+
+
+def compress(path):
+    """Write .gz (and .br, if the brotli package is installed) copies of a file."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path + '.gz', 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    try:
+        import brotli
+    except ImportError:
+        return
+    with open(path + '.br', 'wb') as f:
+        f.write(brotli.compress(data, quality=11))
+
+
+def build(static_dir=STATIC_DIR, dist_dir=DIST_DIR):
+    """Build the fingerprinted bundle and return the manifest."""
+    if os.path.isdir(dist_dir):
+        shutil.rmtree(dist_dir)
+    manifest = {}
+    for asset_dir in ASSET_DIRS:
+        for name in sorted(os.listdir(os.path.join(static_dir, asset_dir))):
+            source = os.path.join(static_dir, asset_dir, name)
+            stem, ext = os.path.splitext(name)
+            hashed = f'{asset_dir}/{stem}.{fingerprint(source)}{ext}'
+            target = os.path.join(dist_dir, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(source, target)
+            compress(target)
+            manifest[f'{asset_dir}/{name}'] = f'dist/{hashed}'
+
+    with open(os.path.join(dist_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(path=MANIFEST_FILE):
+    """Return the manifest written by build(), or {} if assets haven't been built."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+if __name__ == '__main__':
+    try:
+        manifest = build()
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    for source, hashed in sorted(manifest.items()):
+        print(f"  {source} -> {hashed}")
+    print(f"✅ Built {len(manifest)} assets into {DIST_DIR}")
@@ -0,0 +1,631 @@
+#!/usr/bin/env python3
+"""
+Digital Signage - Fleet Benchmark
+Simulates a fleet of players against the server and reports how it copes.
+
+Each simulated player follows player.js: it loads /player/<id>, fetches its
+RSS and weather zones, then sends a heartbeat every 30 seconds and refreshes
+RSS every 10 minutes and weather every 30. It also keeps the config event
+stream open, and after each pushed change fetches the schedule timeline, and
+the delta too when the push doesn't follow on from the version it has. An
+admin client keeps saving display configs with PUT /api/display/<id>; the
+report's "push" row is the time from a save to its event reaching the player.
+Time runs --speed times faster than on a real screen.
+
+RSS feeds and the Open-Meteo API are replaced by a local stub server, so runs
+are repeatable and never touch the internet. By default the app is started
+in-process on Werkzeug's threaded server against a throwaway database, which
+is not how production runs; --gunicorn starts it under gunicorn.conf.py
+(gevent workers) instead. SQLite write-lock waits are read from the server's
+/metrics before and after the run, so they are reported for every target.
+Use --url to benchmark a running server; start it with SIGNAGE_OPEN_METEO_URL
+pointing at --stub-port.
+
+The report is JSON (stdout, or --output), with throughput and p50/p95/p99
+latency per route. Pass an earlier report to --compare to see what changed.
+
+    python3 benchmark.py --players 200 --duration 60 --output run.json
+    python3 benchmark.py --players 200 --duration 60 --compare run.json
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import heapq
+import random
+import socket
+import logging
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+import urllib.parse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+HEARTBEAT_INTERVAL = 30         # seconds, as in player.js
+RSS_REFRESH_INTERVAL = 10 * 60
+WEATHER_REFRESH_INTERVAL = 30 * 60
+REQUEST_TIMEOUT = 30
+EVENTS_RECONNECT = 5            # seconds, the retry the server advertises
+STARTUP_TIMEOUT = 30            # seconds to wait for a gunicorn server to accept connections
+METRICS_SETTLE = 10             # seconds for every worker to publish its metrics, as in app.py
+LOCK_WAIT_THRESHOLD = '0.001'   # histogram bucket below which BEGIN IMMEDIATE didn't wait
+RSS_MODES = ('list', 'rotate', 'ticker')
+
+
+# ─── Upstream Stand-ins ───────────────────────────────────────
+
+class StubUpstream(BaseHTTPRequestHandler):
+    """Serves RSS feeds at /rss/<n> and an Open-Meteo lookalike at /v1/forecast."""
+
+    hits = {'rss': 0, 'rss_not_modified': 0, 'weather': 0, 'weather_locations': 0}
+    hits_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def count(self, key, n=1):
+        with self.hits_lock:
+            self.hits[key] += n
+
+    def send_body(self, body, content_type, headers=()):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        if url.path.startswith('/rss/'):
+            self.serve_feed(url.path.rsplit('/', 1)[-1])
+        elif url.path == '/v1/forecast':
+            self.serve_forecast(urllib.parse.parse_qs(url.query))
+        else:
+            self.send_error(404)
+
+    def serve_feed(self, name):
+        etag = f'"{name}-1"'
+        if self.headers.get('If-None-Match') == etag:
+            self.count('rss_not_modified')
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.count('rss')
+        items = ''.join(
+            f'<item><title>Story {i} from feed {name}</title><link>http://example.com/{name}/{i}</link>'
+            f'<description>&lt;p&gt;Body of story {i}, with &lt;b&gt;markup&lt;/b&gt;.&lt;/p&gt;</description>'
+            f'<pubDate>Mon, 06 Jan 2025 {i % 24:02d}:00:00 GMT</pubDate></item>'
+            for i in range(20))
+        body = (f'<?xml version="1.0"?><rss version="2.0"><channel><title>Feed {name}</title>'
+                f'<link>http://example.com/{name}</link><description>Stub feed</description>'
+                f'{items}</channel></rss>').encode()
+        self.send_body(body, 'application/rss+xml', [('ETag', etag)])
+
+    def serve_forecast(self, query):
+        latitudes = query.get('latitude', [''])[0].split(',')
+        self.count('weather')
+        self.count('weather_locations', len(latitudes))
+        locations = [{
+            'current': {'temperature_2m': 18.5, 'relative_humidity_2m': 60,
+                        'weather_code': 2, 'wind_speed_10m': 12.0},
+            'daily': {'time': ['2025-01-06', '2025-01-07', '2025-01-08'],
+                      'weather_code': [2, 3, 61],
+                      'temperature_2m_max': [20.1, 19.0, 15.2],
+                      'temperature_2m_min': [11.3, 10.8, 9.9]}
+        } for _ in latitudes]
+        body = json.dumps(locations if len(locations) > 1 else locations[0]).encode()
+        self.send_body(body, 'application/json')
+
+
+def start_stub_server(port):
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubUpstream)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_app_server(stub_url):
+    """Run the app in this process on a random port, with a throwaway database."""
+    os.environ['SIGNAGE_OPEN_METEO_URL'] = stub_url
+    os.chdir(tempfile.mkdtemp(prefix='signage-bench-'))
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    import app as signage
+    from werkzeug.serving import make_server
+
+    signage.init_database()
+    signage.start_background_tasks()
+    server = make_server('127.0.0.1', 0, signage.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_gunicorn(stub_url, workers):
+    """Run the app under gunicorn.conf.py on a free port, from a throwaway directory."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    env = dict(os.environ, SIGNAGE_OPEN_METEO_URL=stub_url, PORT=str(port),
+               PYTHONPATH=os.pathsep.join(filter(None, [here, os.environ.get('PYTHONPATH')])))
+    if workers:
+        env['SIGNAGE_WORKERS'] = str(workers)
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', os.path.join(here, 'gunicorn.conf.py'),
+         '--access-logfile', '/dev/null', 'app:app'],
+        cwd=tempfile.mkdtemp(prefix='signage-bench-'), env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'gunicorn exited with status {process.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process, f'http://127.0.0.1:{port}'
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f'gunicorn did not start within {STARTUP_TIMEOUT}s')
+
+
+# ─── Measurement ──────────────────────────────────────────────
+
+class Recorder:
+    """Collects latencies and errors per route."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+
+    def add(self, route, seconds, ok):
+        with self._lock:
+            self.latencies.setdefault(route, []).append(seconds)
+            if not ok:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(int(round(pct / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class Client:
+    """A keep-alive HTTP connection that times every request it makes."""
+
+    def __init__(self, base_url, recorder):
+        url = urllib.parse.urlsplit(base_url)
+        self.host, self.port = url.hostname, url.port or 80
+        self.recorder = recorder
+        self.cookie = None
+        self.conn = None
+
+    def request(self, method, path, route, body=None):
+        headers = {'Cookie': self.cookie} if self.cookie else {}
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        started = time.perf_counter()
+        # An idle keep-alive connection may have been closed by the server;
+        # like a browser, retry once on a new one before counting an error
+        for attempt in range(2):
+            reused = self.conn is not None
+            try:
+                if self.conn is None:
+                    self.conn = http.client.HTTPConnection(self.host, self.port, timeout=REQUEST_TIMEOUT)
+                self.conn.request(method, path, body=body, headers=headers)
+                resp = self.conn.getresponse()
+                data = resp.read()
+                status = resp.status
+                cookie = resp.getheader('Set-Cookie')
+                if cookie:
+                    self.cookie = cookie.split(';', 1)[0]
+                break
+            except (OSError, http.client.HTTPException):
+                self.close()
+                data, status = b'', 0
+                if not reused:
+                    break
+        if route:
+            self.recorder.add(route, time.perf_counter() - started, 200 <= status < 400)
+        return status, data
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+# ─── Fleet ────────────────────────────────────────────────────
+
+def player_layout(index, stub_url, feeds, locations):
+    """A 2x2 layout with a clock, an RSS feed, a weather zone and an announcement."""
+    location = index % locations
+    return {
+        'grid': {'rows': 2, 'cols': 2},
+        'zones': [
+            {'id': 0, 'type': 'clock', 'content': ''},
+            {'id': 1, 'type': 'rss', 'content': f'{stub_url}/rss/{index % feeds}',
+             'rss_mode': RSS_MODES[index % len(RSS_MODES)]},
+            {'id': 2, 'type': 'weather', 'content': '', 'weather_lat': round(40 + location * 0.1, 2),
+             'weather_lon': round(-74 + location * 0.1, 2), 'weather_units': 'C',
+             'weather_location': f'Location {location}', 'weather_refresh': 30},
+            {'id': 3, 'type': 'announcement', 'content': f'Benchmark display {index}'}
+        ],
+        'global_font': 'Inter, sans-serif',
+        'top_bar': {'mode': 'visible', 'show_seconds': True},
+        'orientation': 'landscape'
+    }
+
+
+def seed_displays(admin, args, stub_url):
+    """Create one display per simulated player and return their ids and layouts."""
+    status, _ = admin.request('POST', '/login', None, {'username': args.username, 'password': args.password})
+    if status != 200:
+        raise RuntimeError(f'login failed with HTTP {status}')
+
+    fleet = []
+    for i in range(args.players):
+        status, data = admin.request('POST', '/api/display', None, {'name': f'bench-{i}'})
+        if status != 200:
+            raise RuntimeError(f'creating a display failed with HTTP {status}')
+        display_id = json.loads(data)['display_id']
+        layout = player_layout(i, stub_url, args.feeds, args.locations)
+        status, data = admin.request('PUT', f'/api/display/{display_id}', None, {
+            'name': f'bench-{i}', 'description': 'benchmark', 'layout_config': layout,
+            'background_config': {'type': 'color', 'value': '#000000'}
+        })
+        if status != 200:
+            raise RuntimeError(f'saving a display failed with HTTP {status}')
+        fleet.append((display_id, layout, json.loads(data)['config_version']))
+    return fleet
+
+
+class SaveLog:
+    """When the latest admin save of each display started, so players can time its push.
+
+    Saves are logged before the PUT is sent, since the push can reach the
+    player before the admin client has read the response.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = {}
+
+    def add(self, display_id, started):
+        with self._lock:
+            self._started[display_id] = started
+
+    def pop(self, display_id):
+        with self._lock:
+            return self._started.pop(display_id, None)
+
+
+def watch_events(base_url, recorder, saves, display_id, version, streams, deadline):
+    """Hold a player's config event stream open and follow each push, as player.js does."""
+    client = Client(base_url, recorder)
+    url = urllib.parse.urlsplit(base_url)
+
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=REQUEST_TIMEOUT + 30)
+        streams.append(conn)
+        try:
+            conn.request('GET', f'/api/display/{display_id}/events?version={version}')
+            resp = conn.getresponse()
+            recorder.add('GET /api/display/<id>/events', time.perf_counter() - started, resp.status == 200)
+            if resp.status != 200:
+                resp.read()
+                raise OSError(f'HTTP {resp.status}')
+            event, data = None, None
+            for line in iter(resp.readline, b''):
+                line = line.decode().rstrip('\n')
+                if line.startswith('event: '):
+                    event = line[7:]
+                elif line.startswith('data: '):
+                    data = json.loads(line[6:])
+                elif not line and event:
+                    version = follow_push(client, saves, recorder, display_id, version, event, data)
+                    event, data = None, None
+        except (OSError, ValueError, http.client.HTTPException):
+            pass
+        finally:
+            conn.close()
+        if time.monotonic() < deadline:
+            time.sleep(EVENTS_RECONNECT)
+    client.close()
+
+
+def follow_push(client, saves, recorder, display_id, version, event, data):
+    """Handle one pushed event; returns the config version the player now has."""
+    if event == 'delta':
+        pushed = data['to']
+        if data['from'] != version:
+            client.request('GET', f'/api/display/{display_id}/config/delta?from={version}',
+                           'GET /api/display/<id>/config/delta')
+    elif event == 'config':
+        pushed = data['config_version']
+    else:
+        return version
+
+    started = saves.pop(display_id)
+    if started is not None:
+        recorder.add('push (save to event)', time.perf_counter() - started, True)
+    client.request('GET', f'/api/display/{display_id}/schedule', 'GET /api/display/<id>/schedule')
+    return pushed
+
+
+def rss_query(zone):
+    """The /api/rss query string loadRSSFeed sends for a zone's display mode."""
+    params = {'url': zone['content']}
+    if zone['rss_mode'] == 'ticker':
+        params['titles'] = 1
+    else:
+        params['desc'] = 300 if zone['rss_mode'] == 'rotate' else 200
+    return urllib.parse.urlencode(params)
+
+
+def run_player(base_url, recorder, saves, display_id, layout, version, speed, deadline):
+    """Replay one player's request pattern until the deadline."""
+    client = Client(base_url, recorder)
+    streams = []
+    rss = [z for z in layout['zones'] if z['type'] == 'rss']
+    weather = [z for z in layout['zones'] if z['type'] == 'weather']
+
+    def load_rss():
+        for zone in rss:
+            client.request('GET', '/api/rss?' + rss_query(zone), 'GET /api/rss')
+
+    def load_weather():
+        for zone in weather:
+            query = urllib.parse.urlencode({'lat': zone['weather_lat'], 'lon': zone['weather_lon'],
+                                            'units': zone['weather_units']})
+            client.request('GET', '/api/weather?' + query, 'GET /api/weather')
+
+    def heartbeat():
+        client.request('POST', f'/api/display/{display_id}/heartbeat', 'POST /api/display/<id>/heartbeat')
+
+    # Screens don't all boot at once: spread start-up over one heartbeat interval
+    time.sleep(random.uniform(0, HEARTBEAT_INTERVAL / speed))
+    client.request('GET', f'/player/{display_id}', 'GET /player/<id>')
+    threading.Thread(target=watch_events, daemon=True,
+                     args=(base_url, recorder, saves, display_id, version, streams, deadline)).start()
+    load_rss()
+    load_weather()
+    heartbeat()
+
+    now = time.monotonic()
+    tasks = [(now + interval / speed, interval, i, fn) for i, (interval, fn) in enumerate((
+        (HEARTBEAT_INTERVAL, heartbeat),
+        (RSS_REFRESH_INTERVAL, load_rss),
+        (WEATHER_REFRESH_INTERVAL, load_weather)))]
+    heapq.heapify(tasks)
+    while True:
+        due, interval, i, fn = heapq.heappop(tasks)
+        if due >= deadline:
+            break
+        time.sleep(max(0, due - time.monotonic()))
+        fn()
+        heapq.heappush(tasks, (due + interval / speed, interval, i, fn))
+    client.close()
+    # Keep listening for pushes until the end, then unblock the stream's read
+    time.sleep(max(0, deadline - time.monotonic()))
+    for conn in list(streams):
+        if conn.sock is not None:
+            try:
+                conn.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+def run_admin(admin, saves, fleet, interval, deadline):
+    """Save a random display's config every `interval` seconds, as the editor does."""
+    while time.monotonic() + interval < deadline:
+        time.sleep(interval)
+        display_id = random.choice(fleet)[0]
+        status, data = admin.request('GET', f'/api/display/{display_id}', 'GET /api/display/<id>')
+        if status != 200:
+            continue
+        display = json.loads(data)
+        # Change something on screen, so the save produces a delta to push
+        layout = display['layout_config']
+        layout['zones'][-1]['content'] = f'Benchmark display {display_id}, saved at {time.time():.3f}'
+        saves.add(display_id, time.perf_counter())
+        admin.request('PUT', f'/api/display/{display_id}', 'PUT /api/display/<id>', {
+            'name': display['name'], 'description': display['description'],
+            'layout_config': layout, 'background_config': display['background_config']
+        })
+
+
+# ─── Report ───────────────────────────────────────────────────
+
+def lock_wait_totals(client):
+    """Read signage_db_lock_wait_seconds from /metrics: (transactions, waits, seconds)."""
+    status, data = client.request('GET', '/metrics', None)
+    if status != 200:
+        raise RuntimeError(f'/metrics answered HTTP {status}')
+    totals = {}
+    pattern = r'^signage_db_lock_wait_seconds_(count|sum|bucket\{le="([^"]+)"\}) (\S+)$'
+    for kind, bound, value in re.findall(pattern, data.decode(), re.MULTILINE):
+        totals[bound or kind] = float(value)
+    count = totals.get('count', 0)
+    return count, count - totals.get(LOCK_WAIT_THRESHOLD, 0), totals.get('sum', 0.0)
+
+
+def lock_wait_report(before, after):
+    transactions, waits, seconds = (b - a for a, b in zip(before, after))
+    return {'transactions': int(transactions), 'waits': int(waits), 'wait_seconds': round(seconds, 4)}
+
+
+def build_report(args, recorder, elapsed, lock_waits):
+    routes = {}
+    total = 0
+    for route, values in sorted(recorder.latencies.items()):
+        values.sort()
+        total += len(values)
+        routes[route] = {
+            'requests': len(values),
+            'errors': recorder.errors.get(route, 0),
+            'throughput_rps': round(len(values) / elapsed, 2),
+            'p50_ms': round(percentile(values, 50) * 1000, 2),
+            'p95_ms': round(percentile(values, 95) * 1000, 2),
+            'p99_ms': round(percentile(values, 99) * 1000, 2),
+            'max_ms': round(values[-1] * 1000, 2),
+        }
+
+    return {
+        'config': {
+            'players': args.players, 'duration': args.duration, 'speed': args.speed,
+            'feeds': args.feeds, 'locations': args.locations, 'admin_interval': args.admin_interval,
+            'target': args.url or ('gunicorn' if args.gunicorn else 'in-process'),
+        },
+        # Werkzeug's threaded dev server, not the gunicorn/gevent setup that ships
+        'representative': bool(args.url or args.gunicorn),
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'elapsed_seconds': round(elapsed, 2),
+        'requests': total,
+        'errors': sum(recorder.errors.values()),
+        'throughput_rps': round(total / elapsed, 2),
+        'routes': routes,
+        'upstream': dict(StubUpstream.hits),
+        # Write transactions and the ones that waited over 1ms for the lock
+        'sqlite_lock_waits': lock_waits,
+    }
+
+
+def print_summary(report, baseline=None, out=sys.stderr):
+    print(f"{report['requests']} requests in {report['elapsed_seconds']}s "
+          f"({report['throughput_rps']} req/s, {report['errors']} errors)", file=out)
+    if not report.get('representative', True):
+        print("note: in-process run on Werkzeug's dev server; use --gunicorn for production-like numbers",
+              file=out)
+    print(f"{'route':40} {'reqs':>7} {'err':>5} {'p50':>8} {'p95':>8} {'p99':>8}", file=out)
+    for route, r in report['routes'].items():
+        line = f"{route:40} {r['requests']:7} {r['errors']:5} {r['p50_ms']:8} {r['p95_ms']:8} {r['p99_ms']:8}"
+        old = (baseline or {}).get('routes', {}).get(route)
+        if old and old['p95_ms']:
+            line += f"   p95 {(r['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100:+.0f}%"
+        print(line, file=out)
+    print(f"upstream: {report['upstream']}", file=out)
+    if report['sqlite_lock_waits']:
+        print(f"sqlite lock waits: {report['sqlite_lock_waits']}", file=out)
+
+
+def run_benchmark(args):
+    stub = start_stub_server(args.stub_port)
+    stub_url = f'http://127.0.0.1:{stub.server_address[1]}'
+    process = None
+    if args.url:
+        base_url = args.url.rstrip('/')
+    elif args.gunicorn:
+        process, base_url = start_gunicorn(stub_url, args.workers)
+    else:
+        server = start_app_server(stub_url)
+        base_url = f'http://127.0.0.1:{server.server_address[1]}'
+    try:
+        return measure(args, base_url, stub_url)
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+
+def settle_metrics(args):
+    """Give every worker of a multi-process server time to publish its metrics."""
+    if args.url or args.gunicorn:
+        time.sleep(METRICS_SETTLE)
+
+
+def measure(args, base_url, stub_url):
+    """Seed the fleet, run it against base_url until --duration is up, and build the report."""
+    recorder = Recorder()
+    saves = SaveLog()
+    admin = Client(base_url, recorder)
+    print(f"Seeding {args.players} displays on {base_url}...", file=sys.stderr)
+    fleet = seed_displays(admin, args, stub_url)
+    settle_metrics(args)
+    lock_waits = lock_wait_totals(admin)
+
+    print(f"Running {args.players} players for {args.duration}s at {args.speed}x...", file=sys.stderr)
+    started = time.monotonic()
+    deadline = started + args.duration
+    threads = [threading.Thread(target=run_player, daemon=True,
+                                args=(base_url, recorder, saves, display_id, layout, version,
+                                      args.speed, deadline))
+               for display_id, layout, version in fleet]
+    if args.admin_interval > 0:
+        threads.append(threading.Thread(target=run_admin, daemon=True,
+                                        args=(admin, saves, fleet, args.admin_interval, deadline)))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=max(0, deadline - time.monotonic()) + REQUEST_TIMEOUT)
+    elapsed = time.monotonic() - started
+
+    settle_metrics(args)
+    lock_waits = lock_wait_report(lock_waits, lock_wait_totals(admin))
+    report = build_report(args, recorder, elapsed, lock_waits)
+
+    if args.url:
+        # Leave a shared server as we found it
+        for display_id, _, _ in fleet:
+            admin.request('DELETE', f'/api/display/{display_id}', None)
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the signage server with a simulated fleet of players.')
+    parser.add_argument('--players', type=int, default=100, help='Number of simulated players (default: 100)')
+    parser.add_argument('--duration', type=float, default=60, help='Seconds to run (default: 60)')
+    parser.add_argument('--speed', type=float, default=10,
+                        help='Time compression: 10 sends heartbeats every 3s instead of 30s (default: 10)')
+    parser.add_argument('--feeds', type=int, default=20, help='Distinct RSS feeds across the fleet (default: 20)')
+    parser.add_argument('--locations', type=int, default=50, help='Distinct weather locations (default: 50)')
+    parser.add_argument('--admin-interval', type=float, default=5,
+                        help='Seconds between admin config saves, 0 to disable (default: 5)')
+    parser.add_argument('--url', help='Benchmark a running server instead of starting one in-process')
+    parser.add_argument('--gunicorn', action='store_true',
+                        help='Start the app under gunicorn.conf.py instead of the in-process dev server')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='gunicorn worker processes with --gunicorn (default: as gunicorn.conf.py)')
+    parser.add_argument('--stub-port', type=int, default=0, help='Port for the stub upstream server (default: random)')
+    parser.add_argument('--username', default='admin', help='Admin username for seeding displays')
+    parser.add_argument('--password', default='admin123', help='Admin password for seeding displays')
+    parser.add_argument('--output', help='Write the JSON report here instead of stdout')
+    parser.add_argument('--compare', help='Earlier JSON report to compare p95 latencies against')
+    args = parser.parse_args()
+    # The in-process server runs from a temporary directory
+    if args.output:
+        args.output = os.path.abspath(args.output)
+
+    try:
+        baseline = None
+        if args.compare:
+            with open(args.compare) as f:
+                baseline = json.load(f)
+        report = run_benchmark(args)
+    except KeyboardInterrupt:
+        print("\n\n❌ Benchmark cancelled by user.")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        sys.exit(1)
+
+    print_summary(report, baseline)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report written to {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
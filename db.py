@@ -0,0 +1,223 @@
+"""
+SQLite data-access layer for the Digital Signage application.
+
+All database access goes through a small pool of long-lived connections that
+are opened once in WAL mode and then reused, so a request no longer pays for
+sqlite3.connect() and each connection keeps its prepared-statement cache warm.
+Rows come back as sqlite3.Row, so callers use display['name'] rather than
+positional indexes. A separate SharedCache file holds the weather and RSS
+caches so that every worker process sees the same entries.
+
+In WAL mode readers never wait on a writer: players keep loading their config
+while an admin save is being committed.
+"""
+
+import os
+import json
+import queue
+import sqlite3
+import time
+import threading
+from contextlib import contextmanager
+
+import metrics
+
+DATABASE_FILE = 'signage.db'
+SHARED_CACHE_FILE = os.environ.get('SIGNAGE_CACHE_DB', 'cache.db')
+POOL_SIZE = int(os.environ.get('SIGNAGE_DB_POOL', 8))
+BUSY_TIMEOUT = 5.0           # seconds a writer waits for the write lock
+STATEMENT_CACHE_SIZE = 128   # prepared statements kept per connection
+
+PRAGMAS = (
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',   # safe with WAL, avoids an fsync per commit
+    'PRAGMA foreign_keys = ON',
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA cache_size = -8000',     # ~8MB page cache per connection
+)
+
+
+class ConnectionPool:
+    """A bounded pool of WAL-mode SQLite connections shared between threads."""
+
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = path
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=BUSY_TIMEOUT,
+            isolation_level=None,          # we issue BEGIN/COMMIT ourselves
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection, returning it to the pool afterwards."""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            try:
+                self._idle.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def close_all(self):
+        """Close every idle connection."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def configure(path=DATABASE_FILE, size=POOL_SIZE):
+    """Point the data-access layer at a database file, replacing any existing pool."""
+    global _pool, _shared_cache
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+        _pool = ConnectionPool(path, size)
+        if _shared_cache is not None:
+            _shared_cache._pool.close_all()
+            _shared_cache = None
+    return _pool
+
+
+def get_pool():
+    """Return the active pool, creating one for DATABASE_FILE if needed."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DATABASE_FILE)
+    return _pool
+
+
+def connection():
+    """Context manager yielding a pooled connection (autocommit mode)."""
+    return get_pool().connection()
+
+
+@contextmanager
+def transaction():
+    """Run a block of statements in one write transaction.
+
+    BEGIN IMMEDIATE takes the write lock up front, so concurrent writers queue
+    on busy_timeout instead of failing halfway through with SQLITE_BUSY.
+    """
+    with connection() as conn:
+        started = time.perf_counter()
+        conn.execute('BEGIN IMMEDIATE')
+        metrics.DB_LOCK_WAIT_SECONDS.observe(time.perf_counter() - started)
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+
+def fetchone(sql, params=()):
+    """Execute a query and return the first row (or None)."""
+    with metrics.DB_QUERY_SECONDS.time(operation='fetchone'), connection() as conn:
+        return conn.execute(sql, params).fetchone()
+
+
+def fetchall(sql, params=()):
+    """Execute a query and return all rows."""
+    with metrics.DB_QUERY_SECONDS.time(operation='fetchall'), connection() as conn:
+        return conn.execute(sql, params).fetchall()
+
+
+def execute(sql, params=()):
+    """Execute a single write statement in its own transaction and return the cursor."""
+    with metrics.DB_QUERY_SECONDS.time(operation='execute'), transaction() as conn:
+        return conn.execute(sql, params)
+
+
+def executemany(sql, seq_of_params):
+    """Execute a statement for every parameter tuple in one transaction."""
+    with metrics.DB_QUERY_SECONDS.time(operation='executemany'), transaction() as conn:
+        return conn.executemany(sql, seq_of_params)
+
+
+class SharedCache:
+    """Key/value cache shared by every worker process.
+
+    Entries live in their own WAL-mode SQLite file, so cache refreshes never
+    queue behind writes to the main database. Values are stored as JSON with
+    an absolute expiry time; callers keep their own in-process copy and come
+    here only on a local miss or after refreshing upstream.
+    """
+
+    def __init__(self, path):
+        self._pool = ConnectionPool(path)
+        with self._pool.connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS cache (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                ) WITHOUT ROWID
+            ''')
+
+    def get(self, namespace, key):
+        """Return (value, expires) for a key, or None. Expired entries are returned too."""
+        with metrics.DB_QUERY_SECONDS.time(operation='shared_cache_get'), self._pool.connection() as conn:
+            row = conn.execute('SELECT value, expires FROM cache WHERE namespace = ? AND key = ?',
+                               (namespace, key)).fetchone()
+        return (json.loads(row['value']), row['expires']) if row else None
+
+    def set(self, namespace, key, value, expires):
+        with metrics.DB_QUERY_SECONDS.time(operation='shared_cache_set'), self._pool.connection() as conn:
+            conn.execute('INSERT OR REPLACE INTO cache (namespace, key, value, expires) VALUES (?, ?, ?, ?)',
+                         (namespace, key, json.dumps(value), expires))
+
+    def entries(self, namespace):
+        """Return [(key, value, expires)] for every entry in a namespace."""
+        with metrics.DB_QUERY_SECONDS.time(operation='shared_cache_get'), self._pool.connection() as conn:
+            rows = conn.execute('SELECT key, value, expires FROM cache WHERE namespace = ?',
+                                (namespace,)).fetchall()
+        return [(row['key'], json.loads(row['value']), row['expires']) for row in rows]
+
+    def clear(self, namespace):
+        """Delete every entry in a namespace."""
+        with self._pool.connection() as conn:
+            return conn.execute('DELETE FROM cache WHERE namespace = ?', (namespace,)).rowcount
+
+    def purge(self, older_than):
+        """Delete entries that expired before `older_than` (a timestamp)."""
+        with self._pool.connection() as conn:
+            return conn.execute('DELETE FROM cache WHERE expires < ?', (older_than,)).rowcount
+
+
+_shared_cache = None
+
+
+def shared_cache(path=None):
+    """Return the process-wide SharedCache, opening it at `path` on first use."""
+    global _shared_cache
+    if _shared_cache is None:
+        with _pool_lock:
+            if _shared_cache is None:
+                _shared_cache = SharedCache(path or SHARED_CACHE_FILE)
+    return _shared_cache
@@ -0,0 +1,55 @@
+"""
+Gunicorn configuration for running the Digital Signage server in production.
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Several worker processes share the load. Each uses gevent, so thousands of
+idle player event streams cost a greenlet apiece rather than a thread. The
+weather and RSS caches live in a shared SQLite file (see db.SharedCache), and
+config saves reach every worker through the heartbeat registry's version
+sync, so adding workers adds throughput without multiplying upstream fetches.
+"""
+
+import os
+import time
+import multiprocessing
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('SIGNAGE_WORKERS', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+worker_class = 'gevent'
+worker_connections = int(os.environ.get('SIGNAGE_WORKER_CONNECTIONS', 2000))
+timeout = 60
+graceful_timeout = 10
+keepalive = 5
+accesslog = '-'
+
+
+def on_starting(server):
+    """Import the app and migrate the database once, in the master, before workers fork."""
+    server.started_at = time.perf_counter()
+    import app
+    app.metrics.STARTUP_SECONDS.set(time.perf_counter() - server.started_at, phase='import')
+    app.init_database()
+    # Don't hand the master's open SQLite connections to forked workers
+    app.db.configure(app.DATABASE_FILE)
+
+
+def when_ready(server):
+    """Report how long the master took to get from starting to listening."""
+    import app
+    import_ms = app.metrics.STARTUP_SECONDS.value(phase='import') * 1000
+    migrate_ms = app.metrics.STARTUP_SECONDS.value(phase='migrate') * 1000
+    total_ms = (time.perf_counter() - server.started_at) * 1000
+    server.log.info(f'Ready in {total_ms:.0f}ms (import {import_ms:.0f}ms, migrations {migrate_ms:.0f}ms)')
+
+
+def post_worker_init(worker):
+    import app
+    started = time.perf_counter()
+    app.start_background_tasks()
+    app.metrics.STARTUP_SECONDS.set(time.perf_counter() - started, phase='worker')
+
+
+def worker_exit(server, worker):
+    import app
+    app.heartbeats.flush()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Digital Signage - Offline Gazetteer Loader
+Imports a GeoNames place-name dump into the local database so that weather
+location search (/api/geocode) works without internet access.
+
+Download a dump from https://download.geonames.org/export/dump/, for example
+cities15000.zip (unzipped), plus countryInfo.txt and admin1CodesASCII.txt for
+readable country and region names:
+
+    python3 load-gazetteer.py cities15000.txt --countries countryInfo.txt --admin1 admin1CodesASCII.txt
+"""
+
+import os
+import sys
+import sqlite3
+import argparse
+
+BATCH_SIZE = 5000
+
+
+def find_database():
+    """Find the database file location."""
+    possible_paths = ['data/signage.db', 'signage.db']
+    for path in possible_paths:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def read_countries(path):
+    """Map ISO country codes to names from GeoNames countryInfo.txt."""
+    countries = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.startswith('#'):
+                continue
+            cols = line.rstrip('\n').split('\t')
+            if len(cols) > 4:
+                countries[cols[0]] = cols[4]
+    return countries
+
+
+def read_admin1(path):
+    """Map 'CC.code' admin1 keys to names from GeoNames admin1CodesASCII.txt."""
+    admin1 = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            cols = line.rstrip('\n').split('\t')
+            if len(cols) > 1:
+                admin1[cols[0]] = cols[1]
+    return admin1
+
+
+def read_places(path, countries, admin1):
+    """Yield place rows for populated places (feature class P) in a GeoNames dump."""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            cols = line.rstrip('\n').split('\t')
+            if len(cols) < 15 or cols[6] != 'P':
+                continue
+            country_code, admin1_code = cols[8], cols[10]
+            yield (
+                int(cols[0]),
+                cols[1],
+                cols[2] or cols[1],
+                admin1.get(f'{country_code}.{admin1_code}', admin1_code),
+                countries.get(country_code, country_code),
+                float(cols[4]),
+                float(cols[5]),
+                int(cols[14] or 0),
+            )
+
+
+def load_gazetteer(args):
+    db_path = args.database or find_database()
+    if not db_path:
+        print("❌ Error: Database not found. Please run the application first to create the database.")
+        return False
+
+    countries = read_countries(args.countries) if args.countries else {}
+    admin1 = read_admin1(args.admin1) if args.admin1 else {}
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    if args.replace:
+        cursor.execute('DELETE FROM places')
+
+    count = 0
+    batch = []
+    for place in read_places(args.dump, countries, admin1):
+        batch.append(place)
+        if len(batch) >= BATCH_SIZE:
+            cursor.executemany('INSERT OR REPLACE INTO places VALUES (?, ?, ?, ?, ?, ?, ?, ?)', batch)
+            count += len(batch)
+            batch = []
+    cursor.executemany('INSERT OR REPLACE INTO places VALUES (?, ?, ?, ?, ?, ?, ?, ?)', batch)
+    count += len(batch)
+
+    conn.commit()
+    conn.execute('ANALYZE places')
+    conn.close()
+
+    print(f"✅ Loaded {count} places into {db_path}")
+    return True
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load a GeoNames dump into the offline gazetteer.')
+    parser.add_argument('dump', help='GeoNames dump file, e.g. cities15000.txt')
+    parser.add_argument('--countries', help='GeoNames countryInfo.txt for country names')
+    parser.add_argument('--admin1', help='GeoNames admin1CodesASCII.txt for region names')
+    parser.add_argument('--database', help='Path to signage.db (default: auto-detect)')
+    parser.add_argument('--replace', action='store_true', help='Remove previously loaded places first')
+    try:
+        if not load_gazetteer(parser.parse_args()):
+            sys.exit(1)
+    except KeyboardInterrupt:
+        print("\n\n❌ Operation cancelled by user.")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        sys.exit(1)
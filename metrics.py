@@ -0,0 +1,229 @@
+"""
+In-process metrics for the Digital Signage server, served at /metrics.
+
+Counters, gauges and histograms are plain dicts behind one lock, so recording a
+sample costs a lookup and an addition. render() writes everything out in the
+Prometheus text exposition format.
+
+Each worker process keeps its own numbers, but all workers share one port, so
+a scrape reaches whichever worker accepts it. Workers therefore publish
+snapshot()s to a shared store, and render() merges them. Counters and
+histograms are summed across every worker that has published, including ones
+that have exited, so totals never go backwards between scrapes. Gauges
+describe a single process, so they get a worker label and only live workers
+are reported.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds, from a cached heartbeat to a slow upstream fetch
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_lock = threading.Lock()
+_registry = []
+
+
+def _label_key(names, labels):
+    return tuple(str(labels.get(name, '')) for name in names)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _merge_sum(states, add):
+    """Combine {label key: value} dicts from several workers with `add`."""
+    merged = {}
+    for values in states:
+        for key, value in values.items():
+            merged[key] = add(merged[key], value) if key in merged else value
+    return merged
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class Counter:
+    """A monotonically increasing count, optionally split by labels."""
+
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labels, labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def state(self):
+        with _lock:
+            return dict(self._values)
+
+    def merge(self, states):
+        return _merge_sum((values for _, _, values in states), lambda a, b: a + b)
+
+    def render(self, values=None):
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} counter']
+        values = sorted((self.state() if values is None else values).items())
+        for key, value in values:
+            lines.append(f'{self.name}{_format_labels(self.labels, key)} {value}')
+        return lines
+
+
+class Gauge:
+    """A value that is set rather than accumulated, optionally split by labels."""
+
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self._values = {}
+
+    def set(self, value, **labels):
+        key = _label_key(self.labels, labels)
+        with _lock:
+            self._values[key] = value
+
+    def value(self, **labels):
+        with _lock:
+            return self._values.get(_label_key(self.labels, labels), 0)
+
+    def state(self):
+        with _lock:
+            return dict(self._values)
+
+    def merge(self, states):
+        """Keep each live worker's values apart, keyed by a trailing worker label."""
+        return {key + (worker,): value
+                for worker, live, values in states if live
+                for key, value in values.items()}
+
+    def render(self, values=None):
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} gauge']
+        names = self.labels if values is None else self.labels + ('worker',)
+        if values is None:
+            values = self.state()
+        for key, value in sorted(values.items()):
+            lines.append(f'{self.name}{_format_labels(names, key)} {value}')
+        return lines
+
+
+class Histogram:
+    """Observations counted into fixed buckets, with a running sum and count."""
+
+    def __init__(self, name, description, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}  # label key -> [per-bucket counts (+Inf last), sum, count]
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labels, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with _lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe how long the block takes, in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def state(self):
+        with _lock:
+            return {key: [list(s[0]), s[1], s[2]] for key, s in self._values.items()}
+
+    def merge(self, states):
+        return _merge_sum((values for _, _, values in states),
+                          lambda a, b: [[x + y for x, y in zip(a[0], b[0])], a[1] + b[1], a[2] + b[2]])
+
+    def render(self, values=None):
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} histogram']
+        values = sorted((self.state() if values is None else values).items())
+        for key, (counts, total, count) in values:
+            cumulative = 0
+            for bound, n in zip(self.buckets + ('+Inf',), counts):
+                cumulative += n
+                labels = _format_labels(self.labels, key, [('le', bound)])
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labels, key)} {total}')
+            lines.append(f'{self.name}_count{_format_labels(self.labels, key)} {count}')
+        return lines
+
+
+def counter(name, description, labels=()):
+    metric = Counter(name, description, labels)
+    _registry.append(metric)
+    return metric
+
+
+def gauge(name, description, labels=()):
+    metric = Gauge(name, description, labels)
+    _registry.append(metric)
+    return metric
+
+
+def histogram(name, description, labels=(), buckets=DEFAULT_BUCKETS):
+    metric = Histogram(name, description, labels, buckets)
+    _registry.append(metric)
+    return metric
+
+
+def snapshot():
+    """Return this process's values as JSON-safe data, for publishing to other workers."""
+    return {metric.name: [[list(key), value] for key, value in metric.state().items()]
+            for metric in _registry}
+
+
+def render(snapshots=None):
+    """Return every registered metric in Prometheus text format.
+
+    Without `snapshots` only this process's values are rendered. Otherwise
+    `snapshots` is [(worker, live, snapshot())] for every worker, this one
+    included, and the values are merged as described in the module docstring.
+    """
+    lines = []
+    for metric in _registry:
+        if snapshots is None:
+            lines.extend(metric.render())
+            continue
+        states = [(str(worker), live, {tuple(key): value for key, value in snap.get(metric.name, [])})
+                  for worker, live, snap in snapshots]
+        lines.extend(metric.render(metric.merge(states)))
+    return '\n'.join(lines) + '\n'
+
+
+REQUEST_SECONDS = histogram('signage_http_request_duration_seconds',
+                            'Time to produce a response, by route template.',
+                            ('method', 'route', 'status'))
+DB_QUERY_SECONDS = histogram('signage_db_query_duration_seconds',
+                             'SQLite statement time, by data-access helper.', ('operation',))
+DB_LOCK_WAIT_SECONDS = histogram('signage_db_lock_wait_seconds',
+                                 'Time write transactions waited for the SQLite write lock.')
+UPSTREAM_SECONDS = histogram('signage_upstream_fetch_duration_seconds',
+                             'Outbound fetch time for RSS feeds and Open-Meteo.',
+                             ('upstream', 'outcome'))
+CACHE_LOOKUPS = counter('signage_cache_lookups_total',
+                        'Cache lookups by result; hit ratio is hit / all results.', ('cache', 'result'))
+SLOW_REQUESTS = counter('signage_slow_requests_total',
+                        'Requests slower than SIGNAGE_SLOW_REQUEST_MS, by route template.', ('route',))
+STARTUP_SECONDS = gauge('signage_startup_seconds',
+                        'Time this process spent starting up, by phase (import, migrate, worker).', ('phase',))
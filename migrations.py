@@ -0,0 +1,219 @@
+"""
+Schema migrations for signage.db.
+
+Each step brings the schema up by one version, and PRAGMA user_version
+records how far a database has got, so a start against an up-to-date
+database reads one pragma and applies nothing. Databases created before
+versioning report version 0 while already having some or all of the first
+steps applied, so those steps check before they create or alter anything.
+New steps are appended to MIGRATIONS and never edited once released.
+"""
+
+
+def _add_column(conn, table, column, declaration):
+    """Add a column unless an earlier, unversioned start already added it."""
+    columns = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+    if column not in columns:
+        conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {declaration}')
+
+
+def _base_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS displays (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            description TEXT,
+            layout_config TEXT,
+            background_config TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def _remote_management(conn):
+    _add_column(conn, 'displays', 'last_seen', 'TIMESTAMP')
+    _add_column(conn, 'displays', 'config_version', 'INTEGER DEFAULT 1')
+
+
+def _geocoding(conn):
+    # Geocode lookups cached from the online API
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS geocode_cache (
+            query TEXT PRIMARY KEY,
+            results TEXT NOT NULL,
+            fetched_at REAL NOT NULL
+        )
+    ''')
+    # Optional offline gazetteer, filled by load-gazetteer.py
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS places (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            ascii_name TEXT NOT NULL COLLATE NOCASE,
+            admin1 TEXT,
+            country TEXT,
+            latitude REAL NOT NULL,
+            longitude REAL NOT NULL,
+            population INTEGER DEFAULT 0
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_places_ascii_name ON places (ascii_name)')
+
+
+def _media(conn):
+    # Uploaded media and their resized derivatives
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS media (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            filename TEXT UNIQUE NOT NULL,
+            width INTEGER,
+            height INTEGER,
+            status TEXT NOT NULL DEFAULT 'pending',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS media_variants (
+            media_id INTEGER NOT NULL REFERENCES media (id) ON DELETE CASCADE,
+            name TEXT NOT NULL,
+            filename TEXT NOT NULL,
+            width INTEGER NOT NULL,
+            height INTEGER NOT NULL,
+            bytes INTEGER NOT NULL,
+            PRIMARY KEY (media_id, name)
+        )
+    ''')
+
+
+def _fleet(conn):
+    # Online/offline filters and counts are range scans on last_seen
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_displays_last_seen ON displays (last_seen)')
+    # Free-form labels for selecting groups of displays
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS display_tags (
+            tag TEXT NOT NULL,
+            display_id INTEGER NOT NULL REFERENCES displays (id) ON DELETE CASCADE,
+            PRIMARY KEY (tag, display_id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_display_tags_display ON display_tags (display_id)')
+
+
+def _config_history(conn):
+    # Per-version config deltas, so players can fetch just what changed
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS config_history (
+            display_id INTEGER NOT NULL REFERENCES displays (id) ON DELETE CASCADE,
+            version INTEGER NOT NULL,
+            delta TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (display_id, version)
+        ) WITHOUT ROWID
+    ''')
+
+
+def _media_store(conn):
+    # Resumable uploads in progress; the bytes so far are in UPLOAD_FOLDER/.upload-<id>
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS uploads (
+            id TEXT PRIMARY KEY,
+            extension TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            received INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) WITHOUT ROWID
+    ''')
+    # Which displays' configs use each upload; rebuilt on every save and sweep
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS media_refs (
+            media_id INTEGER NOT NULL REFERENCES media (id) ON DELETE CASCADE,
+            display_id INTEGER NOT NULL REFERENCES displays (id) ON DELETE CASCADE,
+            PRIMARY KEY (media_id, display_id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_media_refs_display ON media_refs (display_id)')
+
+
+def _telemetry(conn):
+    # Player performance samples, one ring buffer per display and resolution:
+    # a row's slot is bucket / resolution modulo the slots kept, so new buckets
+    # overwrite the oldest and each display holds a fixed number of rows
+    conn.execute('''
+        CREATE TABLE telemetry (
+            display_id INTEGER NOT NULL REFERENCES displays (id) ON DELETE CASCADE,
+            resolution INTEGER NOT NULL,
+            slot INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            samples INTEGER NOT NULL,
+            fps REAL,
+            heap_mb REAL,
+            render_ms REAL,
+            asset_errors INTEGER,
+            fetch_ms REAL,
+            PRIMARY KEY (display_id, resolution, slot)
+        ) WITHOUT ROWID
+    ''')
+    # Fleet-wide rankings read one resolution over a recent time range
+    conn.execute('CREATE INDEX idx_telemetry_bucket ON telemetry (resolution, bucket)')
+
+
+def _config_generation(conn):
+    # A counter bumped whenever a display's config_version changes or a display
+    # is deleted, so workers can poll one row instead of re-reading every version
+    conn.execute('''
+        CREATE TABLE config_generation (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            value INTEGER NOT NULL
+        )
+    ''')
+    conn.execute('INSERT INTO config_generation (id, value) VALUES (0, 0)')
+    conn.execute('''
+        CREATE TRIGGER displays_config_version_changed
+        AFTER UPDATE OF config_version ON displays
+        WHEN NEW.config_version IS NOT OLD.config_version
+        BEGIN
+            UPDATE config_generation SET value = value + 1 WHERE id = 0;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER displays_deleted AFTER DELETE ON displays
+        BEGIN
+            UPDATE config_generation SET value = value + 1 WHERE id = 0;
+        END
+    ''')
+
+
+# Step N takes a database from user_version N-1 to N
+MIGRATIONS = [
+    _base_tables,
+    _remote_management,
+    _geocoding,
+    _media,
+    _fleet,
+    _config_history,
+    _media_store,
+    _telemetry,
+    _config_generation,
+]
+
+
+def migrate(conn):
+    """Apply pending steps inside the caller's transaction; returns (old, new) version."""
+    current = conn.execute('PRAGMA user_version').fetchone()[0]
+    latest = len(MIGRATIONS)
+    if current > latest:
+        raise RuntimeError(f'Database schema version {current} is newer than this release ({latest})')
+    for version in range(current + 1, latest + 1):
+        MIGRATIONS[version - 1](conn)
+        conn.execute(f'PRAGMA user_version = {version}')
+    return current, latest
@@ -732,6 +732,11 @@ function renderTypeSettings(zone, i) {
             <label>Video URL</label>
             <input type="text" data-field="content" value="${escHtml(zone.content)}" placeholder="https://example.com/video.mp4">
             <p class="help-text">MP4, WebM, or YouTube URL</p>
+        </div>
+        <div class="form-field">
+            <label>Upload Video</label>
+            <input type="file" id="zoneVideoUpload" accept="video/mp4,video/webm,video/ogg,video/quicktime">
+            <p class="help-text" id="zoneVideoProgress">Large files are sent in chunks and resume after a dropped connection</p>
         </div>`;
     }
 
@@ -1025,6 +1030,10 @@ function bindZonePanelEvents(i) {
     const zbImg = document.getElementById('zoneBackgroundImage');
     if (zbImg) zbImg.addEventListener('change', () => handleZoneImageUpload(i));
 
+    // Video upload
+    const videoInput = document.getElementById('zoneVideoUpload');
+    if (videoInput) videoInput.addEventListener('change', () => handleZoneVideoUpload(i));
+
     // Bind existing schedule entries
     panel.querySelectorAll('.schedule-entry input, .schedule-entry textarea').forEach(el => {
         el.addEventListener('change', () => autoSaveSchedule());
@@ -1076,6 +1085,97 @@ async function handleZoneImageUpload(i) {
     }
 }
 
+async function handleZoneVideoUpload(i) {
+    const input = document.getElementById('zoneVideoUpload');
+    const file = input.files[0];
+    if (!file) return;
+    const progress = document.getElementById('zoneVideoProgress');
+    input.disabled = true;
+    try {
+        const result = await uploadResumable(file, fraction => {
+            if (progress) progress.textContent = `Uploading… ${Math.floor(fraction * 100)}%`;
+        });
+        S.layout.zones[i].content = result.url;
+        const field = document.querySelector('#panelContent [data-field="content"]');
+        if (field) field.value = result.url;
+        if (progress) progress.textContent = 'Upload complete';
+        markDirty();
+        renderGrid();
+        updateLivePreview();
+    } catch (error) {
+        if (progress) progress.textContent = 'Upload stopped; choose the file again to resume';
+        showToast('Upload error: ' + error.message, 'error');
+    } finally {
+        input.disabled = false;
+    }
+}
+
+/* ── Resumable Uploads ──────────────────────────────────────── */
+// Sends a file to /api/uploads in chunks. The upload id is remembered per
+// file, so picking the same file again after a failure or a page reload
+// continues from the last byte the server has.
+const UPLOAD_RETRIES = 5;
+
+async function uploadResumable(file, onProgress) {
+    const key = `upload:${file.name}:${file.size}:${file.lastModified}`;
+    let upload = null;
+
+    const saved = localStorage.getItem(key);
+    if (saved) {
+        const response = await fetch(`/api/uploads/${saved}`);
+        if (response.ok) upload = await response.json();
+    }
+    if (!upload) {
+        const response = await fetch('/api/uploads', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ filename: file.name, size: file.size })
+        });
+        upload = await response.json();
+        if (!response.ok) throw new Error(upload.error || `HTTP ${response.status}`);
+        localStorage.setItem(key, upload.id);
+    }
+
+    const chunkSize = upload.chunk_size || 8 * 1024 * 1024;
+    let offset = upload.offset;
+    let failures = 0;
+    while (true) {
+        onProgress(offset / file.size);
+        let response = null;
+        try {
+            response = await fetch(`/api/uploads/${upload.id}`, {
+                method: 'PATCH',
+                headers: { 'Upload-Offset': String(offset), 'Content-Type': 'application/offset+octet-stream' },
+                body: file.slice(offset, offset + chunkSize)
+            });
+        } catch (error) {
+            // Network failure: back off, then ask the server how much arrived
+            if (++failures > UPLOAD_RETRIES) throw error;
+            await new Promise(resolve => setTimeout(resolve, 1000 * 2 ** failures));
+            const status = await fetch(`/api/uploads/${upload.id}`).catch(() => null);
+            if (status && status.ok) offset = (await status.json()).offset;
+            continue;
+        }
+
+        const result = await response.json();
+        if (response.status === 409 && result.offset != null) {
+            offset = result.offset;
+            continue;
+        }
+        if (!response.ok) {
+            if (response.status === 404) localStorage.removeItem(key);
+            throw new Error(result.error || `HTTP ${response.status}`);
+        }
+        failures = 0;
+        if (result.success) {
+            localStorage.removeItem(key);
+            onProgress(1);
+            return result;
+        }
+        offset = result.offset;
+    }
+}
+
 /* ── Weather Location Search ────────────────────────────────── */
 async function searchWeatherLocation() {
     const locationInput = document.getElementById('weatherLocation');
@@ -8,14 +8,18 @@ let announcementIntervals = {};
 let rssRotationIntervals = {};
 let rssCache = {};
 let weatherIntervals = {};
-let schedulerInterval = null;
+let scheduleTimeline = null;
+let scheduleTimer = null;
 let heartbeatInterval = null;
+let configEvents = null;
 let currentConfigVersion = null;
 let activeSchedules = {};
+let previewMode = false;
 let autoHideTimeout = null;
 
 function initializePlayer(config) {
     displayConfig = config;
+    currentConfigVersion = config.version || null;
 
     console.log('Initializing player with config:', config);
 
@@ -50,6 +54,9 @@ function initializePlayer(config) {
     // Start heartbeat for remote management
     startHeartbeat();
 
+    // Listen for pushed config changes
+    startConfigEvents();
+
     // Handle fullscreen
     document.addEventListener('keydown', function(e) {
         if (e.key === 'F11') {
@@ -61,40 +68,272 @@ function initializePlayer(config) {
         }
     });
 
-    // Auto-refresh display every 5 minutes
-    setInterval(refreshDisplay, 5 * 60 * 1000);
-
     // Listen for live preview config updates from parent (config page iframe)
     window.addEventListener('message', function(e) {
         if (e.data && e.data.type === 'configUpdate') {
             console.log('Received config update from parent');
-            // Clear all intervals
-            if (clockInterval) clearInterval(clockInterval);
-            Object.values(timerIntervals).forEach(i => clearInterval(i));
-            Object.values(slideshowIntervals).forEach(i => clearInterval(i));
-            Object.values(announcementIntervals).forEach(i => clearInterval(i));
-            Object.values(rssRotationIntervals).forEach(i => clearInterval(i));
-            Object.values(weatherIntervals).forEach(i => clearInterval(i));
-            if (autoHideTimeout) clearTimeout(autoHideTimeout);
-
-            timerIntervals = {};
-            slideshowIntervals = {};
-            announcementIntervals = {};
-            rssRotationIntervals = {};
-            weatherIntervals = {};
-
-            // Update config and re-initialize
-            displayConfig.layout = e.data.layout;
-            displayConfig.background = e.data.background;
-            setupOrientation();
-            setupBackground();
-            setupTopBar();
-            setupGrid();
-            startClock();
+            previewMode = true;
+            applyConfig(e.data.layout, e.data.background);
+        }
+    });
+}
+
+// Apply a new layout/background config in place, rebuilding only what changed
+function applyConfig(layout, background) {
+    const oldLayout = displayConfig.layout;
+    const oldBackground = displayConfig.background;
+    displayConfig.layout = layout;
+    displayConfig.background = background;
+    if (previewMode) {
+        // The server's timeline is for the saved config, not the unsaved preview
+        scheduleTimeline = { version: currentConfigVersion, zones: compileSchedule(layout) };
+    } else {
+        // Callers bump currentConfigVersion only once this succeeds, so drop the old
+        // timeline rather than rely on its version; loadScheduleTimeline fetches the new one
+        scheduleTimeline = null;
+    }
+
+    if (needsFullRebuild(oldLayout, layout)) {
+        rebuildDisplay();
+        loadScheduleTimeline();
+        return;
+    }
+
+    if (!sameConfig(oldBackground, background)) setupBackground();
+    if (!sameConfig(oldLayout.top_bar, layout.top_bar)) setupTopBar();
+
+    layout.zones.forEach((zone, index) => {
+        if (!sameConfig(oldLayout.zones[index], zone)) {
+            console.log('Zone', index, 'changed, rebuilding it');
+            rebuildZone(index);
+        }
+    });
+    loadScheduleTimeline();
+}
+
+function sameConfig(a, b) {
+    return JSON.stringify(a) === JSON.stringify(b);
+}
+
+// Grid shape, orientation, global font and zone spans affect every zone
+function needsFullRebuild(oldLayout, layout) {
+    if (!oldLayout || !Array.isArray(oldLayout.zones) || !Array.isArray(layout.zones)) return true;
+    if (oldLayout.zones.length !== layout.zones.length) return true;
+    if (!sameConfig(oldLayout.grid, layout.grid)) return true;
+    if (oldLayout.orientation !== layout.orientation || oldLayout.global_font !== layout.global_font) return true;
+    return layout.zones.some((zone, i) =>
+        (zone.col_span || 1) !== (oldLayout.zones[i].col_span || 1) ||
+        (zone.row_span || 1) !== (oldLayout.zones[i].row_span || 1));
+}
+
+// Replace one zone's element, keeping its place in the grid
+function rebuildZone(index) {
+    const oldElement = document.getElementById(`zone-${index}`);
+    if (!oldElement) {
+        rebuildDisplay();
+        return;
+    }
+
+    teardownZone(index);
+    const zoneElement = createZone(displayConfig.layout.zones[index], index);
+    zoneElement.style.gridColumn = oldElement.style.gridColumn;
+    zoneElement.style.gridRow = oldElement.style.gridRow;
+    zoneElement.style.animationDelay = '0s';
+    oldElement.replaceWith(zoneElement);
+
+    // Freshly built with base content; let the scheduler re-apply any override
+    activeSchedules[index] = '__default__';
+    applySchedules();
+}
+
+// Rebuild the whole display from displayConfig
+function rebuildDisplay() {
+    // Cancel all widget tasks
+    if (clockInterval) cancelTask(clockInterval);
+    Object.values(timerIntervals).forEach(i => cancelTask(i));
+    Object.values(slideshowIntervals).forEach(i => cancelTask(i));
+    Object.values(announcementIntervals).forEach(i => cancelTask(i));
+    Object.values(rssRotationIntervals).forEach(i => cancelTask(i));
+    Object.values(weatherIntervals).forEach(i => cancelTask(i));
+    if (autoHideTimeout) clearTimeout(autoHideTimeout);
+
+    timerIntervals = {};
+    slideshowIntervals = {};
+    announcementIntervals = {};
+    rssRotationIntervals = {};
+    weatherIntervals = {};
+
+    // Re-initialize from the current config
+    setupOrientation();
+    setupBackground();
+    setupTopBar();
+    setupGrid();
+    startClock();
+
+    activeSchedules = {};
+    applySchedules();
+}
+
+// Apply a list of set/remove changes (from /config/delta) to the current config
+function applyDelta(changes) {
+    const doc = JSON.parse(JSON.stringify({
+        layout_config: displayConfig.layout,
+        background_config: displayConfig.background
+    }));
+
+    changes.forEach(change => {
+        // Name and description changes don't affect what's on screen
+        if (!(change.path[0] in doc)) return;
+        let target = doc;
+        change.path.slice(0, -1).forEach(key => { target = target[key]; });
+        const last = change.path[change.path.length - 1];
+        if (change.op === 'remove') {
+            delete target[last];
+        } else {
+            target[last] = change.value;
+        }
+    });
+
+    applyConfig(doc.layout_config, doc.background_config);
+}
+
+// Catch up with the server's config: just the changes if possible, else the full config
+async function reloadConfig() {
+    try {
+        if (currentConfigVersion !== null) {
+            const response = await fetch(`/api/display/${displayConfig.id}/config/delta?from=${currentConfigVersion}`);
+            if (response.ok) {
+                const delta = await response.json();
+                applyDelta(delta.changes);
+                currentConfigVersion = delta.to;
+                return;
+            }
         }
+    } catch (error) {
+        console.warn('Config delta fetch failed:', error.message);
+    }
+
+    try {
+        const response = await fetch(`/api/display/${displayConfig.id}/config`);
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        const data = await response.json();
+        applyConfig(data.layout_config, data.background_config);
+        currentConfigVersion = data.config_version;
+    } catch (error) {
+        console.warn('Config fetch failed, reloading page:', error.message);
+        refreshDisplay();
+    }
+}
+
+// ─── Tick Scheduler ───────────────────────────────────────────
+//
+// Every recurring widget update goes through one scheduler instead of its own
+// setInterval. A single timer wakes at the next due time (aligned to whole
+// seconds, or whole minutes for minute-based tasks, so the clock and timers
+// fire together), and everything due runs inside one animation
+// frame so their DOM writes land in the same paint. While the page is hidden
+// only background tasks (the heartbeat) run; the rest catch up once when it is
+// shown again. tickStats() reports what each task costs.
+
+const tickTasks = new Map();
+let nextTickTaskId = 1;
+let tickTimer = null;
+let tickFramePending = false;
+
+function every(fn, interval, name, options = {}) {
+    const id = nextTickTaskId++;
+    tickTasks.set(id, {
+        fn: fn,
+        interval: interval,
+        name: name || fn.name || 'task',
+        background: !!options.background,
+        due: alignedDue(Date.now(), interval),
+        runs: 0,
+        totalMs: 0,
+        maxMs: 0
+    });
+    scheduleTick();
+    return id;
+}
+
+function cancelTask(id) {
+    tickTasks.delete(id);
+}
+
+function alignedDue(from, interval) {
+    const step = interval % 60000 === 0 ? 60000 : (interval % 1000 === 0 ? 1000 : 1);
+    // The first boundary that is at most one interval away
+    return Math.floor(from / step) * step + interval;
+}
+
+function scheduleTick() {
+    if (tickTimer) clearTimeout(tickTimer);
+    tickTimer = null;
+
+    let next = Infinity;
+    tickTasks.forEach(task => {
+        if ((task.background || !document.hidden) && task.due < next) next = task.due;
     });
+    if (next !== Infinity) {
+        tickTimer = setTimeout(onTick, Math.max(0, next - Date.now()));
+    }
 }
 
+function onTick() {
+    tickTimer = null;
+    if (document.hidden) {
+        // Animation frames don't fire in hidden pages; run background work directly
+        runDueTasks(true);
+        scheduleTick();
+    } else if (!tickFramePending) {
+        tickFramePending = true;
+        requestAnimationFrame(() => {
+            tickFramePending = false;
+            runDueTasks(false);
+            scheduleTick();
+        });
+    }
+}
+
+function runDueTasks(backgroundOnly) {
+    const now = Date.now();
+    tickTasks.forEach((task, id) => {
+        if (task.due > now || (backgroundOnly && !task.background)) return;
+
+        const start = performance.now();
+        try {
+            task.fn();
+        } catch (error) {
+            console.error(`Tick task ${task.name} failed:`, error);
+        }
+        const cost = performance.now() - start;
+        recordRender(cost);
+        task.runs++;
+        task.totalMs += cost;
+        task.maxMs = Math.max(task.maxMs, cost);
+
+        // Skip missed ticks (e.g. while hidden) instead of replaying them
+        task.due += task.interval;
+        if (task.due <= now) task.due = alignedDue(now, task.interval);
+    });
+}
+
+// Per-task tick cost, most expensive first: console.table(tickStats())
+function tickStats() {
+    return Array.from(tickTasks.values())
+        .map(task => ({
+            name: task.name,
+            interval: task.interval,
+            runs: task.runs,
+            avgMs: task.runs ? +(task.totalMs / task.runs).toFixed(3) : 0,
+            maxMs: +task.maxMs.toFixed(3),
+            totalMs: +task.totalMs.toFixed(3)
+        }))
+        .sort((a, b) => b.totalMs - a.totalMs);
+}
+
+document.addEventListener('visibilitychange', scheduleTick);
+
 // ─── Top Bar ──────────────────────────────────────────────────
 
 function setupTopBar() {
@@ -224,7 +463,7 @@ function setupBackground() {
         body.classList.add('bg-color');
         console.log('Applied global background color:', bg.value);
     } else if (bg.type === 'image' && bg.value) {
-        body.style.backgroundImage = `url(${bg.value})`;
+        body.style.backgroundImage = `url(${sizedImageUrl(bg.value, window.innerWidth, window.innerHeight)})`;
         body.style.backgroundSize = 'cover';
         body.style.backgroundPosition = 'center';
         body.style.backgroundRepeat = 'no-repeat';
@@ -310,6 +549,7 @@ function setupGrid() {
 // ─── Zone Creation ────────────────────────────────────────────
 
 function createZone(zone, index) {
+    const buildStart = performance.now();
     console.log('Creating zone', index, 'with type:', zone.type, 'zone data:', zone);
 
     const zoneElement = document.createElement('div');
@@ -329,7 +569,7 @@ function createZone(zone, index) {
         zoneElement.style.backgroundColor = 'transparent';
         console.log('Applied transparent background to zone');
     } else {
-        applyZoneBackground(zoneElement, zone.background);
+        applyZoneBackground(zoneElement, zone.background, zonePixelSize(zone));
     }
 
     const contentElement = document.createElement('div');
@@ -344,7 +584,7 @@ function createZone(zone, index) {
         contentElement.style.backgroundColor = 'transparent';
     } else if (zone.background && zone.background.type !== 'transparent') {
         // Apply background to content element to override widget defaults
-        applyZoneBackground(contentElement, zone.background);
+        applyZoneBackground(contentElement, zone.background, zonePixelSize(zone));
     }
 
     // Apply typography
@@ -376,7 +616,7 @@ function createZone(zone, index) {
             createRSSWidget(contentElement, zone, index);
             break;
         case 'image':
-            createImageWidget(contentElement, zone.content);
+            createImageWidget(contentElement, zone.content, zone);
             break;
         case 'video':
             createVideoWidget(contentElement, zone.content);
@@ -394,6 +634,7 @@ function createZone(zone, index) {
 
     zoneElement.appendChild(contentElement);
     console.log('Zone element created:', zoneElement);
+    recordRender(performance.now() - buildStart);
     return zoneElement;
 }
 
@@ -494,11 +735,11 @@ function startAnnouncementRotation(container, index, interval) {
 
     let current = 0;
 
-    announcementIntervals[index] = setInterval(() => {
+    announcementIntervals[index] = every(() => {
         slides[current].classList.remove('active');
         current = (current + 1) % slides.length;
         slides[current].classList.add('active');
-    }, interval);
+    }, interval, `announcement-${index}`);
 }
 
 // ─── iframe Widget ────────────────────────────────────────────
@@ -548,7 +789,7 @@ function createEmptyWidget(container) {
     `;
 }
 
-function createImageWidget(container, imageUrl) {
+function createImageWidget(container, imageUrl, zone) {
     container.className += ' widget-image';
 
     if (imageUrl) {
@@ -562,6 +803,10 @@ function createImageWidget(container, imageUrl) {
             // For URLs, encode to handle spaces
             imageSrc = encodeURI(imageUrl);
         }
+        if (zone) {
+            const size = zonePixelSize(zone);
+            imageSrc = sizedImageUrl(imageSrc, size.width, size.height);
+        }
 
         container.innerHTML = `
             <img src="${escapeHtml(imageSrc)}"
@@ -597,13 +842,13 @@ function createVideoWidget(container, videoUrl) {
             return;
         }
 
-        // Regular video file
+        // Regular video file; uploads go through /media, which serves byte
+        // ranges so playback starts before the whole file has arrived
         let videoSrc = videoUrl;
         if (!videoUrl.startsWith('http') && !videoUrl.startsWith('/')) {
-            const encodedFilename = encodeURIComponent(videoUrl);
-            videoSrc = `/static/uploads/${encodedFilename}`;
+            videoSrc = `/media/${encodeURIComponent(videoUrl)}`;
         } else {
-            videoSrc = encodeURI(videoUrl);
+            videoSrc = encodeURI(videoUrl).replace(/^\/static\/uploads\//, '/media/');
         }
 
         const videoElement = document.createElement('video');
@@ -620,7 +865,7 @@ function createVideoWidget(container, videoUrl) {
         } else if (videoSrc.toLowerCase().includes('.ogg')) {
             videoElement.innerHTML = `<source src="${escapeHtml(videoSrc)}" type="video/ogg">`;
         } else {
-            videoElement.src = escapeHtml(videoSrc);
+            videoElement.src = videoSrc;
         }
 
         videoElement.onerror = function() {
@@ -670,13 +915,14 @@ function createSlideshowWidget(container, content, index) {
             return;
         }
 
+        const size = zonePixelSize(displayConfig.layout.zones[index] || {});
         const processedImages = imageList.map(url => {
             const trimmedUrl = url.trim();
             if (!trimmedUrl.startsWith('http') && !trimmedUrl.startsWith('/')) {
                 const encodedFilename = encodeURIComponent(trimmedUrl);
-                return `/static/uploads/${encodedFilename}`;
+                return sizedImageUrl(`/static/uploads/${encodedFilename}`, size.width, size.height);
             }
-            return encodeURI(trimmedUrl);
+            return sizedImageUrl(encodeURI(trimmedUrl), size.width, size.height);
         });
 
         container.innerHTML = `
@@ -715,9 +961,9 @@ function createWeatherWidget(container, zone, index) {
 
     if (lat && lon) {
         loadWeather(container, lat, lon, units, location, index);
-        weatherIntervals[index] = setInterval(() => {
+        weatherIntervals[index] = every(() => {
             loadWeather(container, lat, lon, units, location, index);
-        }, refreshMin * 60 * 1000);
+        }, refreshMin * 60 * 1000, `weather-${index}`);
     } else {
         container.querySelector('.weather-container').innerHTML =
             '<div class="empty-text">No location configured</div>';
@@ -780,7 +1026,7 @@ async function loadWeather(container, lat, lon, units, location, index) {
 
 function startClock() {
     updateClock();
-    clockInterval = setInterval(updateClock, 1000);
+    clockInterval = every(updateClock, 1000, 'clock');
 }
 
 function updateClock() {
@@ -851,11 +1097,15 @@ function updateClock() {
 // ─── Timer ────────────────────────────────────────────────────
 
 function startTimer(index, totalSeconds) {
+    // Count down against the wall clock so a paused or late tick can't drift;
+    // the first scheduler tick (on the next whole second) shows totalSeconds - 1
+    const endsAt = Math.floor(Date.now() / 1000) * 1000 + totalSeconds * 1000;
     let remainingSeconds = totalSeconds;
     const warningThreshold = Math.min(60, totalSeconds * 0.2);
     const dangerThreshold = Math.min(10, totalSeconds * 0.05);
 
     const updateTimer = () => {
+        remainingSeconds = Math.max(0, Math.ceil((endsAt - Date.now()) / 1000));
         const mins = Math.floor(remainingSeconds / 60);
         const secs = remainingSeconds % 60;
         const display = `${mins.toString().padStart(2, '0')}:${secs.toString().padStart(2, '0')}`;
@@ -898,7 +1148,7 @@ function startTimer(index, totalSeconds) {
                 if (progressBar) {
                     progressBar.style.width = '0%';
                 }
-                clearInterval(timerIntervals[index]);
+                cancelTask(timerIntervals[index]);
 
                 // Pulse effect when timer ends
                 timerElement.style.animation = 'timerPulse 0.5s ease-in-out infinite';
@@ -906,18 +1156,73 @@ function startTimer(index, totalSeconds) {
                 return;
             }
         }
-
-        remainingSeconds--;
     };
 
     updateTimer();
-    timerIntervals[index] = setInterval(updateTimer, 1000);
+    timerIntervals[index] = every(updateTimer, 1000, `timer-${index}`);
 }
 
 // ─── Slideshow ────────────────────────────────────────────────
 
+// Decoded images kept ready for slideshows, least recently used first. The
+// budget counts decoded pixels (4 bytes each), scaled to the device's memory.
+const IMAGE_CACHE_BUDGET = Math.min(128, (navigator.deviceMemory || 2) * 16) * 1024 * 1024;
+const IMAGE_RETRY_MS = 60 * 1000;   // how long a failed image is skipped
+const SLIDESHOW_LOOKAHEAD = 2;      // images decoded ahead of the current one
+const _imageCache = new Map();      // url -> { image, ready, ok, bytes, failedAt }
+let _imageCacheBytes = 0;
+
+// Fetch and decode an image once; resolves to its cache entry (never rejects)
+function preloadImage(url) {
+    let entry = _imageCache.get(url);
+    if (entry && !entry.ok && entry.failedAt && Date.now() - entry.failedAt > IMAGE_RETRY_MS) {
+        _imageCache.delete(url);
+        entry = null;
+    }
+    if (entry) {
+        // Mark as most recently used
+        _imageCache.delete(url);
+        _imageCache.set(url, entry);
+        return entry.ready;
+    }
+
+    const image = new Image();
+    entry = { image: image, ok: false, bytes: 0, failedAt: null };
+    image.src = url;
+    const loaded = image.decode
+        ? image.decode()
+        : new Promise((resolve, reject) => { image.onload = resolve; image.onerror = reject; });
+
+    entry.ready = loaded.then(() => {
+        entry.ok = true;
+        entry.bytes = image.naturalWidth * image.naturalHeight * 4;
+        if (_imageCache.get(url) === entry) {
+            _imageCacheBytes += entry.bytes;
+            trimImageCache();
+        }
+        return entry;
+    }, () => {
+        console.error('Failed to load slideshow image:', url);
+        telemetry.assetErrors++;
+        entry.failedAt = Date.now();
+        return entry;
+    });
+
+    _imageCache.set(url, entry);
+    return entry.ready;
+}
+
+function trimImageCache() {
+    for (const [url, entry] of _imageCache) {
+        if (_imageCacheBytes <= IMAGE_CACHE_BUDGET) break;
+        _imageCache.delete(url);
+        _imageCacheBytes -= entry.bytes;
+    }
+}
+
 function startSlideshow(index, images, slideTimer = 5000) {
-    let currentImageIndex = 0;
+    let position = -1;
+    let advancing = false;
     const slideshowContainer = document.getElementById(`slideshow-${index}`);
     const imageElement = slideshowContainer.querySelector('.slideshow-image');
     const timerIndicator = slideshowContainer.querySelector('.slideshow-timer-indicator');
@@ -927,42 +1232,59 @@ function startSlideshow(index, images, slideTimer = 5000) {
     // Set transition for smooth crossfade
     imageElement.style.transition = 'opacity 0.8s cubic-bezier(0.4, 0, 0.2, 1)';
 
-    const showNextImage = () => {
-        // Fade out
-        imageElement.style.opacity = '0';
+    // Decode the next few images now so a transition never waits on the network
+    const preloadAhead = () => {
+        const ahead = Math.min(SLIDESHOW_LOOKAHEAD, images.length - 1);
+        for (let step = 1; step <= ahead; step++) {
+            preloadImage(images[(position + step) % images.length]);
+        }
+    };
 
+    const showImage = (url) => {
+        // Fade out, swap to the already-decoded image, fade back in
+        imageElement.style.opacity = '0';
         setTimeout(() => {
-            imageElement.src = images[currentImageIndex];
-            imageElement.onload = () => {
-                // Fade in
-                imageElement.style.opacity = '1';
-                // Show timer indicator briefly when image changes (only if multiple images)
-                if (images.length > 1 && timerIndicator) {
-                    timerIndicator.style.display = 'block';
-                    timerIndicator.style.opacity = '1';
+            imageElement.src = url;
+            imageElement.style.opacity = '1';
+            // Show timer indicator briefly when image changes (only if multiple images)
+            if (images.length > 1 && timerIndicator) {
+                timerIndicator.style.display = 'block';
+                timerIndicator.style.opacity = '1';
+                setTimeout(() => {
+                    timerIndicator.style.opacity = '0';
                     setTimeout(() => {
-                        timerIndicator.style.opacity = '0';
-                        setTimeout(() => {
-                            timerIndicator.style.display = 'none';
-                        }, 300);
-                    }, 1500);
-                }
-            };
-            imageElement.onerror = () => {
-                console.error('Failed to load slideshow image:', images[currentImageIndex]);
-                currentImageIndex = (currentImageIndex + 1) % images.length;
-                setTimeout(showNextImage, 100);
-                return;
-            };
-
-            currentImageIndex = (currentImageIndex + 1) % images.length;
+                        timerIndicator.style.display = 'none';
+                    }, 300);
+                }, 1500);
+            }
         }, 400);
     };
 
+    const showNextImage = async () => {
+        if (advancing) return;
+        advancing = true;
+        try {
+            // Take the next image that decoded, skipping any that failed to load
+            for (let step = 1; step <= images.length; step++) {
+                const next = (position + step) % images.length;
+                const entry = await preloadImage(images[next]);
+                if (!imageElement.isConnected) return;   // zone was torn down meanwhile
+                if (entry.ok) {
+                    position = next;
+                    showImage(images[next]);
+                    break;
+                }
+            }
+            preloadAhead();
+        } finally {
+            advancing = false;
+        }
+    };
+
     showNextImage();
 
     if (images.length > 1) {
-        slideshowIntervals[index] = setInterval(showNextImage, slideTimer);
+        slideshowIntervals[index] = every(showNextImage, slideTimer, `slideshow-${index}`);
     }
 }
 
@@ -970,25 +1292,33 @@ function startSlideshow(index, images, slideTimer = 5000) {
 
 async function loadRSSFeed(feedUrl, index) {
     try {
-        const response = await fetch(`/api/rss?url=${encodeURIComponent(feedUrl)}`);
+        const container = document.getElementById(`rss-content-${index}`);
+        const titleElement = container.parentElement.querySelector('.rss-title');
+        const widgetContainer = container.parentElement; // the .zone-content.widget-rss
+
+        const rssMode = widgetContainer.dataset.rssMode || 'list';
+        const rssInterval = parseInt(widgetContainer.dataset.rssInterval) || 8000;
+
+        // The server sends plain text already cut to what this mode shows
+        const params = new URLSearchParams({ url: feedUrl });
+        if (rssMode === 'ticker') {
+            params.set('titles', '1');
+        } else {
+            params.set('desc', rssMode === 'rotate' ? 300 : 200);
+        }
+
+        const response = await fetch(`/api/rss?${params}`);
         const data = await response.json();
 
         if (data.error) {
             throw new Error(data.error);
         }
 
-        const container = document.getElementById(`rss-content-${index}`);
-        const titleElement = container.parentElement.querySelector('.rss-title');
-        const widgetContainer = container.parentElement; // the .zone-content.widget-rss
-
         if (titleElement) {
             titleElement.textContent = data.title || 'RSS Feed';
             titleElement.classList.remove('widget-loading');
         }
 
-        const rssMode = widgetContainer.dataset.rssMode || 'list';
-        const rssInterval = parseInt(widgetContainer.dataset.rssInterval) || 8000;
-
         if (rssMode === 'rotate') {
             renderRSSRotate(container, data.items, index, rssInterval);
         } else if (rssMode === 'ticker') {
@@ -1016,7 +1346,7 @@ function renderRSSList(container, items) {
         html += `
             <div class="rss-item">
                 <div class="rss-item-title">${escapeHtml(item.title)}</div>
-                <div class="rss-item-description">${truncateText(stripHtml(item.description), 200)}</div>
+                <div class="rss-item-description">${escapeHtml(item.description)}</div>
                 ${item.published ? `<div class="rss-item-date">${formatRSSDate(item.published)}</div>` : ''}
             </div>
         `;
@@ -1032,7 +1362,7 @@ function renderRSSRotate(container, items, index, interval) {
         html += `
             <div class="rss-item${i === 0 ? ' active' : ''}">
                 <div class="rss-item-title">${escapeHtml(item.title)}</div>
-                <div class="rss-item-description">${truncateText(stripHtml(item.description), 300)}</div>
+                <div class="rss-item-description">${escapeHtml(item.description)}</div>
                 ${item.published ? `<div class="rss-item-date">${formatRSSDate(item.published)}</div>` : ''}
             </div>
         `;
@@ -1049,11 +1379,11 @@ function startRSSRotation(container, index, interval) {
 
     let current = 0;
 
-    rssRotationIntervals[index] = setInterval(() => {
+    rssRotationIntervals[index] = every(() => {
         items[current].classList.remove('active');
         current = (current + 1) % items.length;
         items[current].classList.add('active');
-    }, interval);
+    }, interval, `rss-rotation-${index}`);
 }
 
 function renderRSSTicker(container, items, index) {
@@ -1078,13 +1408,13 @@ function renderRSSTicker(container, items, index) {
 
 function startRSSRefresh() {
     // Refresh RSS feeds every 10 minutes
-    setInterval(() => {
+    every(() => {
         displayConfig.layout.zones.forEach((zone, index) => {
             if (zone.type === 'rss' && zone.content) {
                 loadRSSFeed(zone.content, index);
             }
         });
-    }, 10 * 60 * 1000);
+    }, 10 * 60 * 1000, 'rss-refresh');
 }
 
 // ─── Heartbeat & Remote Management ────────────────────────────
@@ -1093,24 +1423,26 @@ function startHeartbeat() {
     if (!displayConfig || !displayConfig.id) return;
 
     sendHeartbeat();
-    heartbeatInterval = setInterval(sendHeartbeat, 30 * 1000); // Every 30 seconds
+    // Keeps running while the page is hidden so the display still shows as online
+    heartbeatInterval = every(sendHeartbeat, 30 * 1000, 'heartbeat', { background: true });
 }
 
 async function sendHeartbeat() {
     try {
         const response = await fetch(`/api/display/${displayConfig.id}/heartbeat`, {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' }
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ telemetry: collectTelemetry() })
         });
+        sampleFrameRate();  // measured now, reported with the next heartbeat
         const data = await response.json();
 
         if (data.config_version) {
             if (currentConfigVersion === null) {
                 currentConfigVersion = data.config_version;
             } else if (data.config_version !== currentConfigVersion) {
-                console.log('Config version changed, refreshing display...');
-                currentConfigVersion = data.config_version;
-                refreshDisplay();
+                console.log('Config version changed, applying new config...');
+                reloadConfig();  // moves currentConfigVersion on once applied
             }
         }
     } catch (error) {
@@ -1118,55 +1450,248 @@ async function sendHeartbeat() {
     }
 }
 
-// ─── Content Scheduler ────────────────────────────────────────
+// ─── Telemetry ────────────────────────────────────────────────
+//
+// Each heartbeat carries what the player saw since the previous one: frame
+// rate (sampled for a second after each heartbeat, while visible), JS heap in
+// use where the browser exposes it, the slowest widget build or tick task,
+// failed image and video loads, and the mean latency of its fetches.
+
+const FPS_SAMPLE_MS = 1000;
+
+const telemetry = {
+    fps: null,
+    renderMaxMs: 0,
+    assetErrors: 0,
+    fetchTotalMs: 0,
+    fetchCount: 0
+};
+
+function recordRender(ms) {
+    if (ms > telemetry.renderMaxMs) telemetry.renderMaxMs = ms;
+}
 
-function startScheduler() {
-    checkSchedules();
-    schedulerInterval = setInterval(checkSchedules, 60 * 1000); // Check every minute
+function collectTelemetry() {
+    const report = {
+        fps: telemetry.fps,
+        heap_mb: performance.memory ? +(performance.memory.usedJSHeapSize / 1048576).toFixed(1) : null,
+        render_ms: +telemetry.renderMaxMs.toFixed(1),
+        asset_errors: telemetry.assetErrors,
+        fetch_ms: telemetry.fetchCount ? +(telemetry.fetchTotalMs / telemetry.fetchCount).toFixed(1) : null
+    };
+    telemetry.fps = null;
+    telemetry.renderMaxMs = 0;
+    telemetry.assetErrors = 0;
+    telemetry.fetchTotalMs = 0;
+    telemetry.fetchCount = 0;
+    return report;
 }
 
-function checkSchedules() {
-    if (!displayConfig || !displayConfig.layout || !displayConfig.layout.zones) return;
+// Count animation frames for a moment; hidden pages don't render, so skip them
+function sampleFrameRate() {
+    if (document.hidden) return;
+    let frames = 0;
+    const start = performance.now();
+    requestAnimationFrame(function count(now) {
+        frames++;
+        if (now - start < FPS_SAMPLE_MS) {
+            requestAnimationFrame(count);
+        } else {
+            telemetry.fps = +(frames * 1000 / (now - start)).toFixed(1);
+        }
+    });
+}
 
-    const now = new Date();
-    const currentDay = now.getDay(); // 0=Sun, 6=Sat
-    const currentTime = now.getHours() * 60 + now.getMinutes(); // minutes since midnight
+// Resource load failures don't bubble, so listen in the capture phase
+window.addEventListener('error', function(e) {
+    const tag = e.target && e.target.tagName;
+    if (tag === 'IMG' || tag === 'VIDEO' || tag === 'SOURCE') telemetry.assetErrors++;
+}, true);
 
-    displayConfig.layout.zones.forEach((zone, index) => {
-        if (!zone.schedule || !Array.isArray(zone.schedule) || zone.schedule.length === 0) return;
+if (window.PerformanceObserver) {
+    try {
+        new PerformanceObserver(list => {
+            list.getEntries().forEach(entry => {
+                if (entry.initiatorType !== 'fetch') return;
+                telemetry.fetchTotalMs += entry.duration;
+                telemetry.fetchCount++;
+            });
+            // Entries are counted here; don't let the buffer fill up
+            performance.clearResourceTimings();
+        }).observe({ type: 'resource' });
+    } catch (error) {
+        console.warn('Fetch timing unavailable:', error.message);
+    }
+}
 
-        let matchedSchedule = null;
-        for (const entry of zone.schedule) {
-            if (!entry.time_start || !entry.time_end) continue;
+// ─── Pushed Config Changes ────────────────────────────────────
 
-            // Check day match
-            if (entry.days && Array.isArray(entry.days) && entry.days.length > 0) {
-                if (!entry.days.includes(currentDay)) continue;
+function startConfigEvents() {
+    if (!displayConfig || !displayConfig.id || !window.EventSource) return;
+
+    // EventSource reconnects on its own and resends the last version it saw;
+    // the heartbeat keeps checking config_version in case the stream is down.
+    const query = currentConfigVersion ? `?version=${currentConfigVersion}` : '';
+    configEvents = new EventSource(`/api/display/${displayConfig.id}/events${query}`);
+
+    configEvents.addEventListener('config', function(e) {
+        const data = JSON.parse(e.data);
+        if (data.config_version === currentConfigVersion) return;
+
+        console.log('Config pushed by server, applying version', data.config_version);
+        try {
+            applyConfig(data.layout_config, data.background_config);
+            currentConfigVersion = data.config_version;
+        } catch (error) {
+            console.warn('Pushed config failed to apply:', error.message);
+            reloadConfig();
+        }
+    });
+
+    configEvents.addEventListener('delta', function(e) {
+        const delta = JSON.parse(e.data);
+        if (delta.from !== currentConfigVersion) {
+            // Not based on what we have: fetch what we're missing instead
+            reloadConfig();
+            return;
+        }
+
+        console.log('Config changes pushed by server, applying version', delta.to);
+        try {
+            applyDelta(delta.changes);
+            currentConfigVersion = delta.to;
+        } catch (error) {
+            // Keep the version we really have, so the reload asks for the right changes
+            console.warn('Pushed changes failed to apply:', error.message);
+            reloadConfig();
+        }
+    });
+
+    configEvents.addEventListener('deleted', function() {
+        console.warn('Display was deleted on the server');
+        configEvents.close();
+    });
+}
+
+// ─── Content Scheduler ────────────────────────────────────────
+
+// The server compiles each zone's schedule into a weekly timeline: [minute of
+// week, schedule entry index or null] pairs, minute 0 being Sunday 00:00 local
+// time. The player applies whatever is current and sleeps until the next
+// transition, so overrides switch on the minute rather than up to a minute late.
+
+const WEEK_MINUTES = 7 * 24 * 60;
+const SCHEDULE_MAX_SLEEP = 60 * 60 * 1000; // re-check hourly in case the clock jumps
+
+function startScheduler() {
+    scheduleTimeline = displayConfig.timeline || null;
+    applySchedules();
+}
+
+// Fetch the timeline for the config version now on screen
+async function loadScheduleTimeline(attempt = 0) {
+    if (previewMode) {
+        applySchedules();
+        return;
+    }
+    try {
+        const response = await fetch(`/api/display/${displayConfig.id}/schedule`);
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        const timeline = await response.json();
+        if (previewMode) return;
+        scheduleTimeline = timeline;
+        if (scheduleTimeline.version < currentConfigVersion && attempt < 3) {
+            // Answered by a worker that hasn't seen the save yet
+            setTimeout(() => loadScheduleTimeline(attempt + 1), 2000);
+        }
+        applySchedules();
+    } catch (error) {
+        console.warn('Schedule fetch failed:', error.message);
+    }
+}
+
+// 'HH:MM' as minutes since midnight, or null if it isn't a time
+function scheduleMinutes(value) {
+    const parts = String(value).split(':').slice(0, 2);
+    if (parts.length < 2 || !parts.every(part => /^\s*[-+]?\d+\s*$/.test(part))) return null;
+    return Number(parts[0]) * 60 + Number(parts[1]);
+}
+
+// Same timeline as the server's compile_schedule, for preview configs it hasn't seen
+function compileSchedule(layout) {
+    const timelines = {};
+    (layout.zones || []).forEach((zone, index) => {
+        const intervals = []; // [start, end, entry index], minutes of week
+        (Array.isArray(zone.schedule) ? zone.schedule : []).forEach((entry, position) => {
+            if (!entry || typeof entry !== 'object') return;
+            const start = scheduleMinutes(entry.time_start);
+            const end = scheduleMinutes(entry.time_end);
+            if (start === null || end === null || end <= start) return;
+            let days = Array.isArray(entry.days) && entry.days.length ? entry.days : [0, 1, 2, 3, 4, 5, 6];
+            days = [...new Set(days.filter(d => Number.isInteger(d) && d >= 0 && d <= 6))];
+            days.forEach(day => intervals.push([day * 1440 + start, day * 1440 + end, position]));
+        });
+        if (!intervals.length) return;
+
+        const minutes = [...new Set([0, ...intervals.map(i => i[0]), ...intervals.map(i => i[1])])]
+            .filter(minute => minute < WEEK_MINUTES)
+            .sort((a, b) => a - b);
+        const transitions = [];
+        minutes.forEach(minute => {
+            const matching = intervals.filter(i => i[0] <= minute && minute < i[1]).map(i => i[2]);
+            const playing = matching.length ? Math.min(...matching) : null;
+            if (!transitions.length || transitions[transitions.length - 1][1] !== playing) {
+                transitions.push([minute, playing]);
             }
+        });
+        timelines[index] = transitions;
+    });
+    return timelines;
+}
 
-            // Parse time
-            const [startH, startM] = entry.time_start.split(':').map(Number);
-            const [endH, endM] = entry.time_end.split(':').map(Number);
-            const startMinutes = startH * 60 + startM;
-            const endMinutes = endH * 60 + endM;
+function applySchedules() {
+    if (scheduleTimer) clearTimeout(scheduleTimer);
+    scheduleTimer = null;
+    // Entry indexes only mean something for the config they were compiled from
+    if (!scheduleTimeline || scheduleTimeline.version !== currentConfigVersion) return;
 
-            if (currentTime >= startMinutes && currentTime < endMinutes) {
-                matchedSchedule = entry;
+    const now = new Date();
+    const minute = now.getDay() * 1440 + now.getHours() * 60 + now.getMinutes();
+    let next = Infinity;
+
+    Object.entries(scheduleTimeline.zones).forEach(([key, transitions]) => {
+        const index = Number(key);
+        const zone = displayConfig.layout.zones[index];
+        if (!zone || !transitions.length) return;
+
+        let current = transitions[0];
+        for (const transition of transitions) {
+            if (transition[0] > minute) {
+                next = Math.min(next, transition[0]);
                 break;
             }
+            current = transition;
         }
+        // After the last transition of the week, wake when the next week starts
+        if (transitions.length > 1) next = Math.min(next, WEEK_MINUTES);
 
-        const scheduleKey = matchedSchedule ? matchedSchedule.label || matchedSchedule.time_start : '__default__';
+        const entry = current[1] === null ? null : (zone.schedule || [])[current[1]];
+        const scheduleKey = entry ? current[1] : '__default__';
         if (activeSchedules[index] !== scheduleKey) {
             activeSchedules[index] = scheduleKey;
-            if (matchedSchedule && matchedSchedule.content !== undefined) {
-                updateZoneContent(index, matchedSchedule.content);
+            if (entry && entry.content !== undefined) {
+                updateZoneContent(index, entry.content);
             } else {
                 // Revert to base content
                 updateZoneContent(index, zone.content);
             }
         }
     });
+
+    if (next === Infinity) return;
+    // Local midnight starting this week plus the transition's minutes; Date handles DST
+    const at = new Date(now.getFullYear(), now.getMonth(), now.getDate() - now.getDay(), 0, next);
+    scheduleTimer = setTimeout(applySchedules, Math.min(Math.max(at - Date.now(), 0), SCHEDULE_MAX_SLEEP));
 }
 
 function updateZoneContent(index, newContent) {
@@ -1177,9 +1702,7 @@ function updateZoneContent(index, newContent) {
     if (!contentElement) return;
 
     // Clear existing interval for this zone
-    if (announcementIntervals[index]) { clearInterval(announcementIntervals[index]); delete announcementIntervals[index]; }
-    if (slideshowIntervals[index]) { clearInterval(slideshowIntervals[index]); delete slideshowIntervals[index]; }
-    if (rssRotationIntervals[index]) { clearInterval(rssRotationIntervals[index]); delete rssRotationIntervals[index]; }
+    teardownZone(index);
 
     const zone = displayConfig.layout.zones[index];
     const zoneWithContent = { ...zone, content: newContent };
@@ -1199,7 +1722,7 @@ function updateZoneContent(index, newContent) {
             createAnnouncementWidget(contentElement, zoneWithContent, index);
             break;
         case 'image':
-            createImageWidget(contentElement, newContent);
+            createImageWidget(contentElement, newContent, zone);
             break;
         case 'video':
             createVideoWidget(contentElement, newContent);
@@ -1216,18 +1739,28 @@ function updateZoneContent(index, newContent) {
     }
 }
 
+// Stop every task belonging to one zone
+function teardownZone(index) {
+    if (announcementIntervals[index]) { cancelTask(announcementIntervals[index]); delete announcementIntervals[index]; }
+    if (slideshowIntervals[index]) { cancelTask(slideshowIntervals[index]); delete slideshowIntervals[index]; }
+    if (rssRotationIntervals[index]) { cancelTask(rssRotationIntervals[index]); delete rssRotationIntervals[index]; }
+    if (timerIntervals[index]) { cancelTask(timerIntervals[index]); delete timerIntervals[index]; }
+    if (weatherIntervals[index]) { cancelTask(weatherIntervals[index]); delete weatherIntervals[index]; }
+}
+
 // ─── Display Refresh & Cleanup ────────────────────────────────
 
 function refreshDisplay() {
-    if (clockInterval) clearInterval(clockInterval);
+    if (clockInterval) cancelTask(clockInterval);
 
-    Object.values(timerIntervals).forEach(interval => clearInterval(interval));
-    Object.values(slideshowIntervals).forEach(interval => clearInterval(interval));
-    Object.values(announcementIntervals).forEach(interval => clearInterval(interval));
-    Object.values(rssRotationIntervals).forEach(interval => clearInterval(interval));
-    Object.values(weatherIntervals).forEach(interval => clearInterval(interval));
-    if (schedulerInterval) clearInterval(schedulerInterval);
-    if (heartbeatInterval) clearInterval(heartbeatInterval);
+    Object.values(timerIntervals).forEach(interval => cancelTask(interval));
+    Object.values(slideshowIntervals).forEach(interval => cancelTask(interval));
+    Object.values(announcementIntervals).forEach(interval => cancelTask(interval));
+    Object.values(rssRotationIntervals).forEach(interval => cancelTask(interval));
+    Object.values(weatherIntervals).forEach(interval => cancelTask(interval));
+    if (scheduleTimer) clearTimeout(scheduleTimer);
+    if (heartbeatInterval) cancelTask(heartbeatInterval);
+    if (configEvents) configEvents.close();
 
     if (autoHideTimeout) clearTimeout(autoHideTimeout);
 
@@ -1251,7 +1784,7 @@ function exitFullscreen() {
 
 // ─── Zone Background ─────────────────────────────────────────
 
-function applyZoneBackground(element, background) {
+function applyZoneBackground(element, background, size) {
     console.log('Applying background:', background);
 
     if (!background || background.type === 'transparent') {
@@ -1277,7 +1810,8 @@ function applyZoneBackground(element, background) {
             break;
         case 'image':
             if (background.url) {
-                element.style.backgroundImage = `url(${background.url})`;
+                const url = size ? sizedImageUrl(background.url, size.width, size.height) : background.url;
+                element.style.backgroundImage = `url(${url})`;
                 element.style.backgroundSize = 'cover';
                 element.style.backgroundPosition = 'center';
                 element.style.backgroundRepeat = 'no-repeat';
@@ -1289,6 +1823,32 @@ function applyZoneBackground(element, background) {
     }
 }
 
+// ─── Sized Media ──────────────────────────────────────────────
+
+// Approximate on-screen size of a zone from its grid span
+function zonePixelSize(zone) {
+    const grid = displayConfig.layout.grid || {};
+    const rows = grid.rows || 1;
+    const cols = grid.cols || 1;
+    return {
+        width: window.innerWidth * Math.min(zone.col_span || 1, cols) / cols,
+        height: window.innerHeight * Math.min(zone.row_span || 1, rows) / rows
+    };
+}
+
+// Point an uploaded image at /media so the server picks the smallest variant
+// that covers the given CSS size. The box is sent in device pixels as is:
+// rounding it up would push a 1920x1080 screen past the 1080p variant.
+function sizedImageUrl(url, width, height) {
+    const match = url.match(/^\/static\/uploads\/([^?#]+)$/);
+    if (!match) return url;
+
+    const dpr = window.devicePixelRatio || 1;
+    const w = Math.round(width * dpr);
+    const h = Math.round(height * dpr);
+    return `/media/${match[1]}?w=${w}&h=${h}`;
+}
+
 function hexToRgba(hex, alpha) {
     const r = parseInt(hex.slice(1, 3), 16);
     const g = parseInt(hex.slice(3, 5), 16);
@@ -1298,21 +1858,10 @@ function hexToRgba(hex, alpha) {
 
 // ─── Utility Functions ────────────────────────────────────────
 
-function escapeHtml(text) {
-    const div = document.createElement('div');
-    div.textContent = text;
-    return div.innerHTML;
-}
+const HTML_ESCAPES = { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;' };
 
-function stripHtml(html) {
-    const div = document.createElement('div');
-    div.innerHTML = html;
-    return div.textContent || div.innerText || '';
-}
-
-function truncateText(text, maxLength) {
-    if (text.length <= maxLength) return text;
-    return text.substr(0, maxLength) + '...';
+function escapeHtml(text) {
+    return String(text == null ? '' : text).replace(/[&<>"']/g, ch => HTML_ESCAPES[ch]);
 }
 
 function formatRSSDate(dateString) {
@@ -1327,15 +1876,16 @@ function formatRSSDate(dateString) {
 // ─── Cleanup on Page Unload ───────────────────────────────────
 
 window.addEventListener('beforeunload', function() {
-    if (clockInterval) clearInterval(clockInterval);
-
-    Object.values(timerIntervals).forEach(interval => clearInterval(interval));
-    Object.values(slideshowIntervals).forEach(interval => clearInterval(interval));
-    Object.values(announcementIntervals).forEach(interval => clearInterval(interval));
-    Object.values(rssRotationIntervals).forEach(interval => clearInterval(interval));
-    Object.values(weatherIntervals).forEach(interval => clearInterval(interval));
-    if (schedulerInterval) clearInterval(schedulerInterval);
-    if (heartbeatInterval) clearInterval(heartbeatInterval);
+    if (clockInterval) cancelTask(clockInterval);
+
+    Object.values(timerIntervals).forEach(interval => cancelTask(interval));
+    Object.values(slideshowIntervals).forEach(interval => cancelTask(interval));
+    Object.values(announcementIntervals).forEach(interval => cancelTask(interval));
+    Object.values(rssRotationIntervals).forEach(interval => cancelTask(interval));
+    Object.values(weatherIntervals).forEach(interval => cancelTask(interval));
+    if (scheduleTimer) clearTimeout(scheduleTimer);
+    if (heartbeatInterval) cancelTask(heartbeatInterval);
+    if (configEvents) configEvents.close();
 
     if (autoHideTimeout) clearTimeout(autoHideTimeout);
 });